@@ -1,5 +1,6 @@
 import search
 import random
+import patternDatabase
 
 # Module Classes
 
@@ -36,6 +37,7 @@ class EightPuzzleState:
         list (a list of lists) 'cells'.
         """
         self.cells = []
+        self._rank = None
         numbers = numbers[:] # Make a copy so as not to cause side-effects.
         numbers.reverse()
         for row in range( 3 ):
@@ -146,8 +148,17 @@ class EightPuzzleState:
                 return False
         return True
 
+    def rank(self):
+        """
+          Returns the position of this puzzle among the 9! orderings of its
+        numbers, a perfect hash that is computed once per state.
+        """
+        if self._rank == None:
+            self._rank = patternDatabase.rankPuzzle(self.cells[0] + self.cells[1] + self.cells[2])
+        return self._rank
+
     def __hash__(self):
-        return hash(str(self.cells))
+        return self.rank()
 
     def __getAsciiString(self):
         """
@@ -180,9 +191,10 @@ class EightPuzzleSearchProblem(search.SearchProblem):
     def __init__(self,puzzle):
         "Creates a new EightPuzzleSearchProblem which stores search information."
         self.puzzle = puzzle
+        self._expanded = 0
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -194,6 +206,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
           from the original state and the cost is 1.0 for each
         """
         succ = []
+        self._expanded += 1
         for a in state.legalMoves():
             succ.append((a, 1, state.result(a)))
         return succ
@@ -207,6 +220,128 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         """
         return len(actions)
 
+class SlidingPuzzleState:
+    """
+    A compact, mutable sliding tile puzzle: the tiles of a size x size board
+    in row-major order in a bytearray, 0 being the blank, plus the index of
+    the blank.  SlidingPuzzleSearchProblem changes it in place.
+    """
+    __slots__ = ('tiles', 'blank')
+
+    def __init__(self, tiles, blank=None):
+        self.tiles = bytearray(tiles)
+        if blank == None: blank = self.tiles.index(0)
+        self.blank = blank
+
+    def copy(self):
+        return SlidingPuzzleState(self.tiles, self.blank)
+
+    def __eq__(self, other):
+        return isinstance(other, SlidingPuzzleState) and self.tiles == other.tiles
+
+    def __hash__(self):
+        return hash(bytes(self.tiles))
+
+    def __str__(self):
+        return str(list(self.tiles))
+
+class SlidingPuzzleSearchProblem(search.InPlaceSearchProblem):
+    """
+      The sliding tile puzzle on a size x size board, with the goal and the
+      moves of EightPuzzleState: the blank in the top left corner and the
+      tiles in order, moving the blank 'up', 'down', 'left' or 'right'.
+
+      States are SlidingPuzzleStates.  getSuccessors copies them, as the
+      other searches require, while the in-place interface used by
+      search.idaStarSearch and search.recursiveBestFirstSearch swaps two
+      bytes per move and reads precomputed move lists, so those searches
+      allocate no states.
+    """
+    def __init__(self, puzzle, size=3):
+        """
+        puzzle: an EightPuzzleState or a list of the size * size numbers
+        """
+        if isinstance(puzzle, EightPuzzleState):
+            puzzle = [number for row in puzzle.cells for number in row]
+        self.size = size
+        self.start = SlidingPuzzleState(puzzle)
+        self.goal = bytearray(range(size * size))
+        self.offsets = {'up': -size, 'down': size, 'left': -1, 'right': 1}
+        self.reverse = {'up': 'down', 'down': 'up', 'left': 'right', 'right': 'left'}
+        # moveTable[blank] lists the legal (move, cost) pairs in legalMoves order
+        self.moveTable = []
+        for blank in range(size * size):
+            row, col = divmod(blank, size)
+            moves = []
+            if row != 0: moves.append(('up', 1))
+            if row != size - 1: moves.append(('down', 1))
+            if col != 0: moves.append(('left', 1))
+            if col != size - 1: moves.append(('right', 1))
+            self.moveTable.append(tuple(moves))
+        self._expanded = 0
+
+    def getStartState(self):
+        return self.start.copy()
+
+    def isGoalState(self, state):
+        return state.tiles == self.goal
+
+    def getSuccessors(self, state):
+        succ = []
+        for move, cost in self.getMoves(state):
+            nextState = state.copy()
+            self.applyMove(nextState, move)
+            succ.append((move, cost, nextState))
+        return succ
+
+    def getCostOfActions(self, actions):
+        return len(actions)
+
+    def getInPlaceStartState(self):
+        return self.start.copy()
+
+    def getMoves(self, state):
+        self._expanded += 1
+        return self.moveTable[state.blank]
+
+    def applyMove(self, state, action):
+        blank = state.blank
+        tile = blank + self.offsets[action]
+        state.tiles[blank] = state.tiles[tile]
+        state.tiles[tile] = 0
+        state.blank = tile
+        return blank
+
+    def undoMove(self, state, token):
+        tiles = state.tiles
+        tiles[state.blank] = tiles[token]
+        tiles[token] = 0
+        state.blank = token
+
+    def reverseAction(self, action):
+        return self.reverse[action]
+
+def slidingPuzzleManhattanHeuristic(state, problem):
+    "The sum of the Manhattan distances of the tiles from their goal cells"
+    size = problem.size
+    total = 0
+    for index, tile in enumerate(state.tiles):
+        if tile != 0:
+            row, col = divmod(index, size)
+            goalRow, goalCol = divmod(tile, size)
+            total += abs(row - goalRow) + abs(col - goalCol)
+    return total
+
+def eightPuzzleManhattanHeuristic(state, problem):
+    "slidingPuzzleManhattanHeuristic for EightPuzzleState states"
+    total = 0
+    for row in range(3):
+        for col in range(3):
+            tile = state.cells[row][col]
+            if tile != 0:
+                total += abs(row - tile // 3) + abs(col - tile % 3)
+    return total
+
 EIGHT_PUZZLE_DATA = [[1, 0, 2, 3, 4, 5, 6, 7, 8],
                      [1, 7, 8, 2, 3, 4, 5, 6, 0],
                      [4, 3, 2, 7, 0, 5, 1, 6, 8],
@@ -252,6 +252,178 @@ class Grid:
                 bools.append(False)
         return bools
 
+def _popcount(n):
+    return bin(n).count('1')
+if hasattr(int, 'bit_count'): _popcount = int.bit_count
+
+class BitGrid:
+    """
+    A boolean Grid packed into a single Python int.  Cell (x,y) is bit
+    x * height + y, the same cell order as Grid.asList and Grid.packBits,
+    so a BitGrid hashes and compares equal to a Grid with the same contents.
+
+    Since the int is immutable, copy() is O(1) and the hash is computed once
+    and cached until the next write; count() is a popcount and asList() only
+    visits set bits.  grid[x][y] reads and writes go through a small column
+    proxy, so a BitGrid can stand in for a Grid of booleans.
+    """
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.bits = (1 << (width * height)) - 1 if initialValue else 0
+        self._hash = None
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    def fromGrid(grid):
+        "Returns a BitGrid with the contents of a Grid"
+        g = BitGrid(grid.width, grid.height)
+        bits = 0
+        for x, column in enumerate(grid.data):
+            for y, cell in enumerate(column):
+                if cell: bits |= 1 << (x * grid.height + y)
+        g.bits = bits
+        return g
+    fromGrid = staticmethod(fromGrid)
+
+    def asGrid(self):
+        "Returns a list-of-lists Grid with the same contents"
+        g = Grid(self.width, self.height)
+        for x, y in self.asList():
+            g.data[x][y] = True
+        return g
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.width:
+            if -self.width <= x < 0: x += self.width
+            else: raise IndexError('grid index out of range')
+        return _BitGridColumn(self, x)
+
+    def _setCell(self, x, y, value):
+        bit = 1 << (x * self.height + y)
+        if value:
+            self.bits |= bit
+        else:
+            self.bits &= ~bit
+        self._hash = None
+
+    def __str__(self):
+        out = [[str(self[x][y])[0] for x in range(self.width)] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if other == None: return False
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.height == other.height and self.width == other.width
+        if isinstance(other, Grid):
+            return self == BitGrid.fromGrid(other)
+        return False
+
+    def __hash__(self):
+        if self._hash == None:
+            self._hash = hash(self.bits)
+        return self._hash
+
+    def _getData(self):
+        "The contents as a list of columns, for code that reads Grid.data"
+        return [list(self[x]) for x in range(self.width)]
+    data = property(_getData)
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits = self.bits
+        g._hash = self._hash
+        return g
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def count(self, item =True ):
+        trues = _popcount(self.bits)
+        if item: return trues
+        return self.width * self.height - trues
+
+    def asList(self, key = True):
+        bits = self.bits
+        if not key:
+            bits ^= (1 << (self.width * self.height)) - 1
+        list = []
+        while bits:
+            lowest = bits & -bits
+            list.append(self._cellIndexToPosition(lowest.bit_length() - 1))
+            bits ^= lowest
+        return list
+
+    def packBits(self):
+        """
+        Returns the same (width, height, bitPackedInts...) tuple as
+        Grid.packBits, so reconstituteGrid accepts it
+        """
+        bits = [self.width, self.height]
+        size = self.width * self.height
+        for start in range(0, size, self.CELLS_PER_INT):
+            chunk = (self.bits >> start) & ((1 << self.CELLS_PER_INT) - 1)
+            # Grid.packBits stores the first cell of a chunk in its highest bit
+            bits.append(int(format(chunk, '0%db' % self.CELLS_PER_INT)[::-1], 2))
+        if size % self.CELLS_PER_INT == 0:
+            bits.append(0)
+        return tuple(bits)
+
+    def _cellIndexToPosition(self, index):
+        x = index // self.height
+        y = index % self.height
+        return x, y
+
+    def _unpackBits(self, bits):
+        """
+        Fills in data from a bit-level representation
+        """
+        size = self.width * self.height
+        value = 0
+        for i, packed in enumerate(bits):
+            if packed < 0: raise ValueError("must be a positive integer")
+            chunk = int(format(packed, '0%db' % self.CELLS_PER_INT)[::-1], 2)
+            value |= chunk << (i * self.CELLS_PER_INT)
+        self.bits = value & ((1 << size) - 1)
+        self._hash = None
+
+class _BitGridColumn:
+    "A view of column x of a BitGrid that supports column[y] reads and writes"
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def _index(self, y):
+        height = self.grid.height
+        if 0 <= y < height: return y
+        if -height <= y < 0: return y + height
+        raise IndexError('grid index out of range')
+
+    def __getitem__(self, y):
+        grid = self.grid
+        return (grid.bits >> (self.x * grid.height + self._index(y))) & 1 == 1
+
+    def __setitem__(self, y, value):
+        self.grid._setCell(self.x, self._index(y), value)
+
+    def __len__(self):
+        return self.grid.height
+
+    def __iter__(self):
+        grid = self.grid
+        column = grid.bits >> (self.x * grid.height)
+        for y in range(grid.height):
+            yield (column >> y) & 1 == 1
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
         return bitRep
@@ -307,6 +479,38 @@ class Actions:
         return (dx * speed, dy * speed)
     directionToVector = staticmethod(directionToVector)
 
+    _successorTables = {}
+
+    def getSuccessorTable(walls):
+        """
+        Returns a dictionary from every open cell (x,y) of walls to a tuple of
+        (action, (nextx, nexty)) pairs, one for each North, South, East or West
+        move that stays on the board and does not hit a wall, in that order.
+
+        The table is built once per wall configuration and remembered on the
+        walls Grid itself, so later calls cost a single attribute lookup.  It
+        assumes walls is not modified afterwards, which holds for layouts.
+        """
+        table = getattr(walls, '_successorTable', None)
+        if table != None: return table
+
+        key = walls.packBits()
+        if key not in Actions._successorTables:
+            table = {}
+            moves = [(dir, Actions._directions[dir]) for dir in
+                     [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]]
+            for x, y in walls.asList(False):
+                successors = []
+                for dir, (dx, dy) in moves:
+                    next_x, next_y = x + dx, y + dy
+                    if 0 <= next_x < walls.width and 0 <= next_y < walls.height and not walls[next_x][next_y]:
+                        successors.append((dir, (next_x, next_y)))
+                table[(x, y)] = tuple(successors)
+            Actions._successorTables[key] = table
+        walls._successorTable = Actions._successorTables[key]
+        return walls._successorTable
+    getSuccessorTable = staticmethod(getSuccessorTable)
+
     def getPossibleActions(config, walls):
         possible = []
         x, y = config.pos
@@ -316,6 +520,12 @@ class Actions:
         if (abs(x - x_int) + abs(y - y_int)  > Actions.TOLERANCE):
             return [config.getDirection()]
 
+        successors = Actions.getSuccessorTable(walls).get((x_int, y_int))
+        if successors != None:
+            possible = [dir for dir, next in successors]
+            possible.append(Directions.STOP)
+            return possible
+
         for dir, vec in Actions._directionsAsList:
             dx, dy = vec
             next_y = y_int + dy
@@ -329,6 +539,12 @@ class Actions:
     def getLegalNeighbors(position, walls):
         x,y = position
         x_int, y_int = int(x + 0.5), int(y + 0.5)
+        successors = Actions.getSuccessorTable(walls).get((x_int, y_int))
+        if successors != None:
+            neighbors = [next for dir, next in successors]
+            neighbors.append((x_int, y_int))
+            return neighbors
+
         neighbors = []
         for dir, vec in Actions._directionsAsList:
             dx, dy = vec
@@ -1,5 +1,6 @@
 from util import manhattanDistance
 from game import Grid
+from game import Actions
 import os
 import random
 from functools import reduce
@@ -48,6 +49,15 @@ class Layout:
         else:
             self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
 
+    def getSuccessorTable(self):
+        """
+        Returns the table of legal North, South, East and West moves out of
+        every open cell (see game.Actions.getSuccessorTable).  It is built
+        once per wall configuration and shared by every search problem and
+        game state on these walls.
+        """
+        return Actions.getSuccessorTable(self.walls)
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
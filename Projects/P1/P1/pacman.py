@@ -509,6 +509,8 @@ def readCommand( argv ):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--searchStats', dest='searchStats', metavar='FILE',
+                      help='Records the statistics of each search a search agent runs to FILE, as JSON or, for a .csv FILE, CSV', default=None)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -529,6 +531,10 @@ def readCommand( argv ):
     if options.numTraining > 0:
         args['numTraining'] = options.numTraining
         if 'numTraining' not in agentOpts: agentOpts['numTraining'] = options.numTraining
+    if options.searchStats != None:
+        if 'searchStats' not in pacmanType.__init__.__code__.co_varnames:
+            raise Exception('--searchStats needs a search agent, such as SearchAgent')
+        agentOpts['searchStats'] = options.searchStats
     pacman = pacmanType(**agentOpts) # Instantiate Pacman with agentArgs
     args['pacman'] = pacman
 
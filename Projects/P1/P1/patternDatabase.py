@@ -0,0 +1,248 @@
+# patternDatabase.py
+# ------------------
+# Additive pattern database heuristics for the sliding tile puzzle.
+
+"""
+A pattern database stores, for every placement of a few tiles of a sliding
+tile puzzle, the number of moves of those tiles needed to bring them to their
+goal cells, found by one breadth first search backwards from the goal.  When
+the tiles are split into disjoint patterns and only moves of a pattern's own
+tiles are counted, the values of the patterns can be added and the sum is
+still an admissible, consistent heuristic, much stronger than Manhattan
+distance.
+
+Placements are numbered with rankPositions, a perfect hash of k distinct
+cells out of n onto 0 .. n!/(n-k)! - 1, so each database is a flat byte
+array with one entry per placement and cell of the blank.  With k = n the
+same ranking numbers whole puzzle states.
+
+Databases are memoized in this process and written to CACHE_DIR, from where
+later runs memory-map them instead of searching again.
+
+Example:
+heuristic = AdditivePatternDatabaseHeuristic(3)
+search.idaStarSearch(SlidingPuzzleSearchProblem(puzzle), heuristic)
+"""
+
+import collections, mmap, os, struct
+
+# Set to None to keep databases in memory only
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patternDatabaseCache')
+
+# Stored for placements the search never reached
+UNKNOWN = 255
+
+_CACHE_MAGIC = b'PDB2'
+
+def rankPositions(positions, n):
+    """
+    Returns the rank of a sequence of k distinct numbers from range(n) among
+    all such sequences, between 0 and n!/(n-k)! - 1.  With k = n this is the
+    lexicographic rank of a permutation.
+    """
+    rank = 0
+    radix = n
+    for i, position in enumerate(positions):
+        smaller = position
+        for j in range(i):
+            if positions[j] < position: smaller -= 1
+        rank = rank * radix + smaller
+        radix -= 1
+    return rank
+
+def unrankPositions(rank, n, k):
+    "Returns the list of k positions with the given rank; inverts rankPositions"
+    digits = []
+    for radix in range(n - k + 1, n + 1):
+        rank, digit = divmod(rank, radix)
+        digits.append(digit)
+    digits.reverse()
+    free = list(range(n))
+    return [free.pop(digit) for digit in digits]
+
+def countPositions(n, k):
+    "The number of ranks of k positions out of n, n!/(n-k)!"
+    count = 1
+    for radix in range(n - k + 1, n + 1):
+        count *= radix
+    return count
+
+def rankPuzzle(tiles):
+    "Returns the rank of a puzzle given as the row-major list of its tiles"
+    return rankPositions(tiles, len(tiles))
+
+def defaultPatterns(size, patternSize=4):
+    """
+    Splits the tiles of a size x size puzzle into disjoint patterns of at
+    most patternSize consecutive tiles: (1, 2, 3, 4), (5, 6, 7, 8) for the
+    eight puzzle.
+    """
+    tiles = list(range(1, size * size))
+    return [tuple(tiles[i:i + patternSize]) for i in range(0, len(tiles), patternSize)]
+
+class PatternDatabase:
+    """
+    The moves of the tiles in pattern needed to bring them from any cells of
+    a size x size board to their goal cells, the blank being in the top left
+    corner and tile t in cell t at the goal.
+
+    The entry for the tiles being in cells positions, in the order of
+    pattern, and the blank in cell blank is
+    data[offset + rankPositions(positions, size * size) * size * size + blank].
+    Keeping the blank makes the sum of disjoint databases consistent: one
+    move changes the entry of the moved tile's pattern by one and leaves the
+    others unchanged, so A* never needs to reopen a state.
+    """
+    def __init__(self, size, pattern, data=None, offset=0):
+        self.size = size
+        self.pattern = tuple(pattern)
+        if data == None:
+            data = self._computeDatabase()
+        self.data = data
+        self.offset = offset
+
+    def getValue(self, positions, blank):
+        "Returns the database entry for the pattern tiles being in positions"
+        n = self.size * self.size
+        return self.data[self.offset + rankPositions(positions, n) * n + blank]
+
+    def __len__(self):
+        n = self.size * self.size
+        return countPositions(n, len(self.pattern)) * n
+
+    def _computeDatabase(self):
+        """
+        A breadth first search over the placements of the pattern tiles and
+        the blank.  Moving the blank onto another tile is free, so the search
+        keeps a deque in order of cost, putting free moves at the front.
+        """
+        size = self.size
+        n = size * size
+        k = len(self.pattern)
+        neighbors = []
+        for cell in range(n):
+            row, col = divmod(cell, size)
+            adjacent = []
+            if row != 0: adjacent.append(cell - size)
+            if row != size - 1: adjacent.append(cell + size)
+            if col != 0: adjacent.append(cell - 1)
+            if col != size - 1: adjacent.append(cell + 1)
+            neighbors.append(adjacent)
+
+        costs = bytearray([UNKNOWN]) * (countPositions(n, k) * n)
+        goal = tuple(self.pattern)
+        costs[rankPositions(goal, n) * n] = 0
+        fringe = collections.deque([(goal, 0, 0)])
+        while fringe:
+            positions, blank, cost = fringe.popleft()
+            rank = rankPositions(positions, n)
+            if costs[rank * n + blank] < cost: continue
+            for cell in neighbors[blank]:
+                if cell in positions:
+                    i = positions.index(cell)
+                    nextPositions = positions[:i] + (blank,) + positions[i + 1:]
+                    nextRank, nextCost = rankPositions(nextPositions, n), cost + 1
+                else:
+                    nextPositions, nextRank, nextCost = positions, rank, cost
+                index = nextRank * n + cell
+                if nextCost < costs[index]:
+                    costs[index] = nextCost
+                    if nextCost == cost:
+                        fringe.appendleft((nextPositions, cell, nextCost))
+                    else:
+                        fringe.append((nextPositions, cell, nextCost))
+        return costs
+
+class AdditivePatternDatabaseHeuristic:
+    """
+    The sum of disjoint pattern databases of a size x size puzzle, callable
+    as a search heuristic(state, problem) for SlidingPuzzleState and
+    EightPuzzleState states.
+
+    patterns defaults to defaultPatterns(size) and must not share tiles.
+    """
+    def __init__(self, size=3, patterns=None):
+        if patterns == None:
+            patterns = defaultPatterns(size)
+        tiles = [tile for pattern in patterns for tile in pattern]
+        if len(tiles) != len(set(tiles)) or 0 in tiles:
+            raise Exception('Additive patterns must be disjoint and exclude the blank')
+        self.size = size
+        self.databases = [getPatternDatabase(size, pattern) for pattern in patterns]
+
+    def __call__(self, state, problem=None):
+        if hasattr(state, 'tiles'):
+            tiles = state.tiles
+        else:
+            tiles = [tile for row in state.cells for tile in row]
+        cellOf = [0] * len(tiles)
+        for cell, tile in enumerate(tiles):
+            cellOf[tile] = cell
+        n = len(tiles)
+        blank = cellOf[0]
+        total = 0
+        for database in self.databases:
+            rank = rankPositions([cellOf[tile] for tile in database.pattern], n)
+            total += database.data[database.offset + rank * n + blank]
+        return total
+
+_databases = {} # (size, pattern) -> PatternDatabase
+
+def getPatternDatabase(size, pattern):
+    """
+    Returns the PatternDatabase of pattern on a size x size board, computing
+    it at most once in this process and at most once on this machine when
+    CACHE_DIR is writable.
+    """
+    key = (size, tuple(pattern))
+    if key not in _databases:
+        database = _loadDatabase(size, pattern)
+        if database == None:
+            database = PatternDatabase(size, pattern)
+            _saveDatabase(database)
+        _databases[key] = database
+    return _databases[key]
+
+def _cachePath(size, pattern):
+    name = 'pdb%d-%s.pdb' % (size, '-'.join([str(tile) for tile in pattern]))
+    return os.path.join(CACHE_DIR, name)
+
+def _header(size, pattern):
+    return _CACHE_MAGIC + struct.pack('<BB', size, len(pattern)) + bytes(pattern)
+
+def _loadDatabase(size, pattern):
+    if CACHE_DIR == None: return None
+    try:
+        f = open(_cachePath(size, pattern), 'rb')
+    except OSError:
+        return None
+    try:
+        header = _header(size, pattern)
+        n = size * size
+        expected = len(header) + countPositions(n, len(pattern)) * n
+        if os.fstat(f.fileno()).st_size != expected or f.read(len(header)) != header:
+            return None
+        # The map stays valid after the file is closed
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    finally:
+        f.close()
+    return PatternDatabase(size, pattern, data, len(header))
+
+def _saveDatabase(database):
+    if CACHE_DIR == None: return
+    path = _cachePath(database.size, database.pattern)
+    tmpPath = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        f = open(tmpPath, 'wb')
+        try:
+            f.write(_header(database.size, database.pattern))
+            f.write(database.data[database.offset:])
+        finally:
+            f.close()
+        os.replace(tmpPath, path)
+    except OSError:
+        # The cache is only an optimization; a read-only tree still works
+        if os.path.exists(tmpPath): os.remove(tmpPath)
@@ -17,6 +17,7 @@ In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
 
+import heapq, itertools, os, time
 import util
 
 class SearchProblem:
@@ -73,6 +74,109 @@ def tinyMazeSearch(problem):
     w = Directions.WEST
     return  [s, s, w, s, w, w, s, w]
 
+class StateLimitExceeded(Exception):
+    "Raised by graphSearch when it would store more than its maxStates states"
+    pass
+
+def graphSearch(problem, fringe, priority=None, lifo=False, maxStates=None):
+    """
+    The graph search shared by dfs, bfs, ucs and astar.
+
+    Fringe entries are (state, parent, action, g) tuples, so no plan is copied
+    while searching.  The first time a state is popped it is closed and its
+    (parent, action, g) is stored in a hashed table; once a goal is popped
+    the plan is rebuilt from those parent pointers.
+
+      fringe:   an empty util.Stack, util.Queue or util.PriorityQueue
+      priority: function (state, g) -> priority, required for a PriorityQueue
+      lifo:     True for a Stack; successors are then pushed in reverse so
+                they are expanded in the order getSuccessors returns them
+
+    A successor is not pushed when it is already closed or, for FIFO and
+    priority fringes, when it is already on the fringe with a cost no
+    greater than the new one: such an entry could only be popped after the
+    existing one and would then be discarded.  Plans and expansion counts
+    are the same as without the pruning.
+
+    With maxStates, StateLimitExceeded is raised once more than maxStates
+    distinct states have been generated.
+    """
+    startState = problem.getStartState()
+    closed = {}
+    fringeCost = {startState: 0}
+    stats = getattr(problem, '_searchStatistics', None)
+
+    if priority is None:
+        fringe.push((startState, None, None, 0))
+    else:
+        fringe.push((startState, None, None, 0), priority(startState, 0))
+
+    while not fringe.isEmpty():
+        entry = fringe.pop()
+        state = entry[0]
+        if state in closed:
+            if stats != None: stats.duplicates += 1
+            continue
+        closed[state] = entry[1:]
+        if problem.isGoalState(state):
+            return reconstructPlan(closed, state)
+        if maxStates != None and len(fringeCost) > maxStates:
+            raise StateLimitExceeded()
+
+        successors = problem.getSuccessors(state)
+        if lifo:
+            successors = reversed(successors)
+        g = entry[3]
+        for action, stepCost, nextState in successors:
+            if nextState in closed:
+                if stats != None: stats.duplicates += 1
+                continue
+            nextCost = g + stepCost
+            if not lifo:
+                # FIFO order ignores cost: any earlier entry pops first
+                if priority is None:
+                    nextCost = 0
+                if nextState in fringeCost and fringeCost[nextState] <= nextCost:
+                    if stats != None: stats.duplicates += 1
+                    continue
+                fringeCost[nextState] = nextCost
+            if priority is None:
+                fringe.push((nextState, state, action, g + stepCost))
+            else:
+                fringe.push((nextState, state, action, g + stepCost), priority(nextState, g + stepCost))
+        if stats != None: stats.updateFringe(len(fringe))
+
+def reconstructPlan(closed, state):
+    """
+    Follows the (parent, action, g) pointers stored by graphSearch back from
+    state to the start state and returns the list of actions leading to state.
+    """
+    plan = []
+    parent, action, g = closed[state]
+    while action is not None:
+        plan.append(action)
+        parent, action, g = closed[parent]
+    plan.reverse()
+    return plan
+
+PRIORITY_QUEUES = {
+    'heap': util.PriorityQueue,
+    'bucket': util.BucketPriorityQueue,
+    'bucketlifo': lambda: util.BucketPriorityQueue(lifo=True),
+}
+
+def makePriorityQueue(queue='heap'):
+    """
+    Returns an empty priority queue of the named kind:
+      heap:       util.PriorityQueue, for any priorities
+      bucket:     util.BucketPriorityQueue, for non-negative integer
+                  priorities; pops in the same order as heap
+      bucketlifo: the bucket queue with last-in first-out tie breaking
+    """
+    if queue not in PRIORITY_QUEUES:
+        raise AttributeError(queue + ' is not a priority queue type; use one of ' + ', '.join(PRIORITY_QUEUES))
+    return PRIORITY_QUEUES[queue]()
+
 def depthFirstSearch(problem):
     """
     Search the deepest nodes in the search tree first.
@@ -88,86 +192,17 @@ def depthFirstSearch(problem):
     print("Start's successors:", problem.getSuccessors(problem.getStartState()))
     """
     "*** YOUR CODE HERE ***"
-    startState = problem.getStartState()
-    path = util.Stack()
-    visited = []
-
-    def dfs(state):
-        if state in visited:
-            return False
-        visited.append(state)
-        if problem.isGoalState(state):
-            return True
-        succList = problem.getSuccessors(state)
-        for action, cost, nextState in succList:
-            path.push(action)
-            if dfs(nextState):
-                return True
-            path.pop()
-        return False
-
-    dfs(startState)
-    return path.list
+    return graphSearch(problem, util.Stack(), lifo=True)
 
 def breadthFirstSearch(problem):
     """Search the shallowest nodes in the search tree first."""
     "*** YOUR CODE HERE ***"
-    startState = problem.getStartState()
-    fringe = util.Queue()
-    fringe.push((startState, []))
-    visited = []
-
-    while not fringe.isEmpty():
-        state, path = fringe.pop()
-        if problem.isGoalState(state):
-            return path
-        if state not in visited:
-            succList = problem.getSuccessors(state)
-            for action, cost, nextState in succList:
-                fringe.push((nextState, path+[action]))
-            visited.append(state)
+    return graphSearch(problem, util.Queue())
 
-
-def uniformCostSearch(problem):
+def uniformCostSearch(problem, queue='heap'):
     """Search the node of least total cost first."""
     "*** YOUR CODE HERE ***"
-    """startState = problem.getStartState()
-    ancestor = {}
-    currCost = {}
-    currCost[startState] = 0
-    fringe = util.PriorityQueue()
-    fringe.push(startState, 0)
-    visited = [startState]
-
-    while not fringe.isEmpty():
-        state = fringe.pop()
-        if problem.isGoalState(state):
-            path = []
-            while state in ancestor:
-                path.append(ancestor[state][0])
-                state = ancestor[state][1]
-            return path[::-1]
-        succList = problem.getSuccessors(state)
-        for action, cost, nextState in succList:
-            if nextState not in visited:
-                fringe.push(nextState, cost+currCost[state])
-                visited.append(nextState)
-                currCost[nextState] = cost + currCost[state]
-                ancestor[nextState] = (action, state)"""
-    startState = problem.getStartState()
-    fringe = util.PriorityQueue()
-    fringe.push((startState, [], 0), 0)
-    visited = []
-
-    while not fringe.isEmpty():
-        state, path, currCost = fringe.pop()
-        if problem.isGoalState(state):
-            return path
-        if state not in visited:
-            succList = problem.getSuccessors(state)
-            for action, cost, nextState in succList:
-                fringe.push((nextState, path + [action], cost+currCost), cost+currCost)
-            visited.append(state)
+    return graphSearch(problem, makePriorityQueue(queue), lambda state, g: g)
 
 
 def nullHeuristic(state, problem=None):
@@ -177,24 +212,1230 @@ def nullHeuristic(state, problem=None):
     """
     return 0
 
-def aStarSearch(problem, heuristic=nullHeuristic):
-    """Search the node that has the lowest combined cost and heuristic first."""
+class MemoizedHeuristic:
+    """
+    Wraps a heuristic so that it is computed once per distinct state: values
+    are kept in a util.LRUCache of capacity states, so memory stays bounded
+    and the least recently used values are recomputed when needed again.
+    States must be hashable and immutable, as they are for graph search, so
+    it cannot wrap the heuristic of an InPlaceSearchProblem searched in place.
+
+    hits and misses count the calls answered from the cache and the calls
+    passed on to the heuristic.  Values depend on the problem, so there is
+    one cache per problem, and only the caches of the last two problems are
+    kept: enough for the forward and backward problems of the bidirectional
+    searches.
+
+    heuristic = MemoizedHeuristic(foodHeuristic, 100000)
+    aStarSearch(problem, heuristic)
+    """
+    def __init__(self, heuristic, capacity):
+        self.heuristic = heuristic
+        self.capacity = capacity
+        self.caches = [] # (problem, util.LRUCache) pairs, most recent last
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, state, problem=None):
+        caches = self.caches
+        if not caches or caches[-1][0] is not problem:
+            for entry in caches:
+                if entry[0] is problem:
+                    caches.remove(entry)
+                    break
+            else:
+                entry = (problem, util.LRUCache(self.capacity))
+                if len(caches) == 2: del caches[0]
+            caches.append(entry)
+        cache = caches[-1][1]
+        value = cache.get(state)
+        if value is None:
+            self.misses += 1
+            value = self.heuristic(state, problem)
+            cache[state] = value
+        else:
+            self.hits += 1
+        return value
+
+class SearchStatistics:
+    """
+    Counts the work of one search run, for searches of a problem that
+    attach(problem) has been called on; other searches pay nothing but a
+    lookup per run.
+
+      expanded, generated: calls to getSuccessors, getPredecessors or
+                           getMoves and the successors they returned
+      duplicates:          successors dropped, or fringe entries skipped,
+                           because their state was already reached as cheaply
+      reopened:            states expanded again after a cheaper path to
+                           them was found
+      maxFringe:           the most entries on the fringe at once (for
+                           idastar and rbfs, the longest path)
+      heuristicCalls,
+      heuristicSeconds:    calls to an InstrumentedHeuristic and their time
+
+    Searches that cannot tell duplicates, reopenings or fringe sizes apart
+    leave them at 0.  With sampleInterval=N the counters are also copied
+    into samples every N expansions, along with the seconds since attach.
+    Searches spread over processes sample every N expansions in each
+    process, and mergeSamples adds them up.
+    """
+    COUNTERS = ('expanded', 'generated', 'duplicates', 'reopened', 'maxFringe', 'heuristicCalls', 'heuristicSeconds')
+
+    def __init__(self, sampleInterval=None, info=None):
+        self.sampleInterval = sampleInterval
+        self.info = info or {} # Names describing the run, such as the search function
+        self.reset()
+        self._expanding = False
+
+    def reset(self):
+        "Sets the counters back to zero and drops the samples"
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.heuristicSeconds = 0.0
+        self.samples = []
+        self.startTime = time.time()
+        self.seconds = 0.0
+
+    def attach(self, problem):
+        """
+        Makes searches of problem report to these statistics, wrapping its
+        successor functions to count expansions.
+        """
+        problem._searchStatistics = self
+        for name in ('getSuccessors', 'getPredecessors', 'getMoves'):
+            if hasattr(problem, name):
+                setattr(problem, name, self._countExpansions(getattr(problem, name)))
+        self.startTime = time.time()
+
+    def _countExpansions(self, expand):
+        def countedExpand(state):
+            # Successor functions built on each other count once
+            if self._expanding:
+                return expand(state)
+            self._expanding = True
+            try:
+                successors = expand(state)
+            finally:
+                self._expanding = False
+            self.expanded += 1
+            self.generated += len(successors)
+            if self.sampleInterval and self.expanded % self.sampleInterval == 0:
+                self.sample()
+            return successors
+        return countedExpand
+
+    def updateFringe(self, size):
+        if size > self.maxFringe: self.maxFringe = size
+
+    def sample(self):
+        counters = self.getCounters()
+        counters['seconds'] = time.time() - self.startTime
+        self.samples.append(counters)
+
+    def finish(self):
+        "Records the seconds since attach"
+        self.seconds = time.time() - self.startTime
+
+    def getCounters(self):
+        return dict([(name, getattr(self, name)) for name in self.COUNTERS])
+
+    def merge(self, counters):
+        "Adds the counters of another process's statistics, as from getCounters"
+        for name in self.COUNTERS:
+            if name == 'maxFringe':
+                self.updateFringe(counters[name])
+            else:
+                setattr(self, name, getattr(self, name) + counters[name])
+
+    def mergeSamples(self, sampleLists):
+        """
+        Adds the samples of other processes, one list per process, ordered
+        by time.  Each merged sample totals the latest sample of every
+        process up to then, taking the largest maxFringe.
+        """
+        events = [(sample['seconds'], process, sample)
+                  for process, samples in enumerate(sampleLists) for sample in samples]
+        events.sort(key=lambda event: (event[0], event[1]))
+        latest = {}
+        for seconds, process, sample in events:
+            latest[process] = sample
+            total = {}
+            for name in self.COUNTERS:
+                values = [counters[name] for counters in latest.values()]
+                if name == 'maxFringe':
+                    total[name] = max(values)
+                else:
+                    total[name] = sum(values)
+            total['seconds'] = seconds
+            self.samples.append(total)
+        self.samples.sort(key=lambda sample: sample['seconds'])
+
+class InstrumentedHeuristic:
+    """
+    Wraps a heuristic so that its calls and their time are counted in the
+    SearchStatistics attached to the problem it is called with, if any.
+    """
+    def __init__(self, heuristic):
+        self.heuristic = heuristic
+
+    def __call__(self, state, problem=None):
+        stats = getattr(problem, '_searchStatistics', None)
+        if stats == None:
+            return self.heuristic(state, problem)
+        start = time.perf_counter()
+        value = self.heuristic(state, problem)
+        stats.heuristicSeconds += time.perf_counter() - start
+        stats.heuristicCalls += 1
+        return value
+
+def saveSearchStatistics(runs, path):
+    """
+    Writes a list of SearchStatistics to path: as CSV when path ends in
+    .csv, with a row per sample and a 'total' row per run, and as JSON
+    otherwise.
+    """
+    import csv, json
+    f = open(path, 'w', newline='')
+    try:
+        if not path.lower().endswith('.csv'):
+            json.dump({'runs': [dict(run.info, seconds=run.seconds, counters=run.getCounters(), samples=run.samples)
+                                for run in runs]}, f, indent=2)
+            return
+        infoNames = sorted(set([name for run in runs for name in run.info]))
+        writer = csv.writer(f)
+        writer.writerow(['run'] + infoNames + ['sample', 'seconds'] + list(SearchStatistics.COUNTERS))
+        for number, run in enumerate(runs):
+            info = [run.info.get(name, '') for name in infoNames]
+            rows = [(index, sample) for index, sample in enumerate(run.samples)]
+            rows.append(('total', dict(run.getCounters(), seconds=run.seconds)))
+            for index, counters in rows:
+                writer.writerow([number] + info + [index, counters['seconds']] + [counters[name] for name in SearchStatistics.COUNTERS])
+    finally:
+        f.close()
+
+def aStarSearch(problem, heuristic=nullHeuristic, queue='heap', maxStates=None):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+
+    With maxStates, once more than maxStates states are held in memory an
+    ExternalSearchProblem is searched again by externalAStarSearch, which
+    keeps them on disk; other problems raise StateLimitExceeded.  The
+    expansions of the abandoned search are not counted in problem._expanded.
+    """
     "*** YOUR CODE HERE ***"
     "python pacman.py -l bigMaze -z .5 -p SearchAgent -a fn=astar,heuristic=manhattanHeuristic"
+    priority = lambda state, g: g + heuristic(state, problem)
+    if maxStates == None:
+        return graphSearch(problem, makePriorityQueue(queue), priority)
+    expanded = getattr(problem, '_expanded', None)
+    try:
+        return graphSearch(problem, makePriorityQueue(queue), priority, maxStates=maxStates)
+    except StateLimitExceeded:
+        if not isinstance(problem, ExternalSearchProblem):
+            raise
+    if expanded != None:
+        problem._expanded = expanded
+    return externalAStarSearch(problem, heuristic)
+
+def anytimeRepairingAStarSearch(problem, heuristic=nullHeuristic, budget=None, weight=3.0, weightStep=0.5):
+    """
+    Anytime repairing A* (ARA*, Likhachev, Gordon and Thrun): weighted A*,
+    ordering states by g + weight * h, finds a plan quickly; the search is
+    then repeated with the weight lowered by weightStep down to 1, each time
+    reusing the path costs found so far and only re-expanding states whose
+    cost has dropped.  With an admissible heuristic, each plan costs at most
+    weight times the optimal one, and the last one is optimal.  Ties are
+    broken towards the deeper state, which finds the first plan sooner.
+
+    budget is a number of seconds.  Once it has passed and a plan has been
+    found, the best plan so far is returned.  The suboptimality bound
+    reached, the plan's cost over a lower bound on the optimal cost, is
+    stored on the problem as _suboptimalityBound.
+    """
+    startTime = time.time()
+    infinity = float('inf')
+    heuristicValues = {}
+    def h(state):
+        if state not in heuristicValues:
+            heuristicValues[state] = heuristic(state, problem)
+        return heuristicValues[state]
+
     startState = problem.getStartState()
+    costs = {startState: 0}
+    links = {startState: None} # state -> (parent, action)
+    goal, goalCost = None, infinity
+    stats = getattr(problem, '_searchStatistics', None)
+    if problem.isGoalState(startState):
+        goal, goalCost = startState, 0
+    # Open states and closed states whose cost dropped in this round
+    openStates, inconsistent = set([startState]), set()
+    # The weight of the last round that ran to completion
+    completedWeight = infinity
+
+    while True:
+        fringe = util.PriorityQueue()
+        for state in openStates:
+            fringe.push((state, costs[state]), (costs[state] + weight * h(state), -costs[state]))
+        closed = set()
+        outOfTime = False
+        while not fringe.isEmpty():
+            priority, count, (state, g) = fringe.heap[0]
+            if state in closed or g != costs[state]:
+                fringe.pop()
+                if stats != None: stats.duplicates += 1
+                continue
+            if priority[0] >= goalCost:
+                break
+            if budget != None and goal is not None and time.time() - startTime > budget:
+                outOfTime = True
+                break
+            fringe.pop()
+            openStates.discard(state)
+            closed.add(state)
+            for action, stepCost, nextState in problem.getSuccessors(state):
+                nextCost = g + stepCost
+                if nextState in costs and costs[nextState] <= nextCost:
+                    if stats != None: stats.duplicates += 1
+                    continue
+                costs[nextState] = nextCost
+                links[nextState] = (state, action)
+                if nextCost < goalCost and problem.isGoalState(nextState):
+                    goal, goalCost = nextState, nextCost
+                if nextState in closed:
+                    inconsistent.add(nextState)
+                else:
+                    openStates.add(nextState)
+                    fringe.push((nextState, nextCost), (nextCost + weight * h(nextState), -nextCost))
+            if stats != None: stats.updateFringe(len(fringe))
+
+        if goal is None:
+            return None
+        if not outOfTime:
+            completedWeight = weight
+        # Every cheaper plan passes through an open or inconsistent state
+        lowerBound = min([costs[state] + h(state) for state in openStates | inconsistent] or [goalCost])
+        if goalCost == 0:
+            problem._suboptimalityBound = 1.0
+        elif lowerBound > 0:
+            problem._suboptimalityBound = min(completedWeight, goalCost / lowerBound)
+        else:
+            problem._suboptimalityBound = completedWeight
+        if outOfTime or weight <= 1 or (budget != None and time.time() - startTime > budget):
+            break
+        weight = max(1.0, weight - weightStep)
+        if stats != None: stats.reopened += len(inconsistent)
+        openStates |= inconsistent
+        inconsistent = set()
+
+    plan = []
+    link = links[goal]
+    while link is not None:
+        plan.append(link[1])
+        link = links[link[0]]
+    plan.reverse()
+    return plan
+
+def jumpPointSearch(problem, heuristic=nullHeuristic):
+    """
+    A* over jump points, for problems whose getJumpPointProblem method
+    returns a jump point version of themselves (see
+    searchAgents.JumpPointProblem).  Each step of that plan is a run of
+    primitive actions, which are returned in order.  Other problems are
+    searched with plain aStarSearch.
+    """
+    if not hasattr(problem, 'getJumpPointProblem'):
+        return aStarSearch(problem, heuristic)
+    jumpProblem = problem.getJumpPointProblem()
+    if jumpProblem == None:
+        return aStarSearch(problem, heuristic)
+    stats = getattr(problem, '_searchStatistics', None)
+    if stats != None: stats.attach(jumpProblem)
+    plan = aStarSearch(jumpProblem, lambda state, jumpProblem: heuristic(state[0], problem))
+    if plan == None:
+        return None
+    return [action for run in plan for action in run]
+
+# States a hashDistributedAStarSearch worker expands between reads of its inbox
+HDA_BATCH_SIZE = 64
+# Seconds a hashDistributedAStarSearch worker waits for messages while others
+# hold cheaper open states
+HDA_THROTTLE_WAIT = 0.001
+
+def hashDistributedAStarSearch(problem, heuristic=nullHeuristic, workers=2):
+    """
+    Hash distributed A* (HDA*, Kishimoto, Fukunaga and Botea) over workers
+    processes.  Worker i owns the states s with hash(s) % workers == i and
+    runs A* on them alone: successors owned by other workers are sent to
+    them in batches, and a state reached again more cheaply is reopened.
+    Each worker publishes the best (f, -g) priority in its open list in a
+    shared array, and waits rather than expanding while another worker's
+    is better, so the workers together expand close to the order A* would.
+
+    Each plan found is broadcast to the other workers as an upper bound,
+    and a worker expands nothing once the bound is at most its lowest f.
+    This process probes the workers in waves, and the search ends when no
+    worker has an open state below the bound and two waves in a row count
+    the same numbers of batches sent and received, so none is in flight
+    (Mattern's four counter method).  The plan is then optimal for an
+    admissible heuristic, and is rebuilt by asking the owner of each state
+    for its parent.  The workers' expansions are added to problem._expanded.
+
+    The workers are forked where the platform allows, so the problem and
+    heuristic need not be picklable there; states are always sent between
+    processes, and must hash the same way in all of them.  With fewer than
+    two workers this is aStarSearch.
+    """
+    workers = int(workers)
+    if workers < 2:
+        return aStarSearch(problem, heuristic)
+    import multiprocessing
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    inboxes = [context.Queue() for i in range(workers)]
+    results = context.Queue()
+    frontier = context.RawArray('d', [float('inf')] * (2 * workers))
+    processes = [context.Process(target=_hdaStarWorker, args=(index, workers, problem, heuristic, inboxes, results, frontier))
+                 for index in range(workers)]
+    for process in processes:
+        process.daemon = True
+        process.start()
+
+    try:
+        startState = problem.getStartState()
+        inboxes[hash(startState) % workers].put(('nodes', [(startState, 0, None, None)]))
+        goal, goalCost = None, float('inf')
+        wave, replies, lastCounts = 0, [], None
+        for inbox in inboxes: inbox.put(('probe', wave))
+        while True:
+            message = _hdaStarReceive(results, processes)
+            if message[0] == 'goal':
+                # The worker has already sent the bound to the others
+                if message[2] < goalCost:
+                    goal, goalCost = message[1], message[2]
+                continue
+            # A ('status', wave, idle, sent, received) reply to a probe
+            replies.append(message)
+            if len(replies) < workers:
+                continue
+            idle = all([reply[2] for reply in replies])
+            # The start batch was sent from this process
+            counts = (1 + sum([reply[3] for reply in replies]), sum([reply[4] for reply in replies]))
+            if idle and counts[0] == counts[1] and counts == lastCounts:
+                break
+            lastCounts = counts if idle else None
+            if not idle:
+                time.sleep(0.001)
+            wave, replies = wave + 1, []
+            for inbox in inboxes: inbox.put(('probe', wave))
+
+        plan = None
+        if goal is not None:
+            plan = []
+            state = goal
+            while True:
+                inboxes[hash(state) % workers].put(('parent', state))
+                parent, action = _hdaStarReceive(results, processes)[1:]
+                if action is None:
+                    break
+                plan.append(action)
+                state = parent
+            plan.reverse()
+
+        for inbox in inboxes: inbox.put(('stop',))
+        sampleLists = []
+        for index in range(workers):
+            expanded, hits, misses, counters, samples = _hdaStarReceive(results, processes)[1:]
+            if hasattr(problem, '_expanded'):
+                problem._expanded += expanded
+            if counters != None:
+                problem._searchStatistics.merge(counters)
+                sampleLists.append(samples)
+            if isinstance(heuristic, MemoizedHeuristic):
+                heuristic.hits += hits
+                heuristic.misses += misses
+        if sampleLists:
+            problem._searchStatistics.mergeSamples(sampleLists)
+    finally:
+        for process in processes:
+            process.join(1.0)
+            if process.is_alive(): process.terminate()
+    return plan
+
+def _hdaStarReceive(results, processes):
+    "The next message to hashDistributedAStarSearch, failing if a worker has died"
+    import queue
+    while True:
+        try:
+            message = results.get(timeout=1.0)
+        except queue.Empty:
+            if not all([process.is_alive() for process in processes]):
+                raise Exception('A hashDistributedAStarSearch worker exited unexpectedly')
+            continue
+        if message[0] == 'error':
+            raise Exception('A hashDistributedAStarSearch worker failed:\n' + message[1])
+        return message
+
+def _hdaStarWorker(index, workers, problem, heuristic, inboxes, results, frontier):
+    """
+    Worker index of hashDistributedAStarSearch: reads ('nodes', batch),
+    ('bound', cost), ('probe', wave), ('parent', state) and ('stop',)
+    messages from inboxes[index] and answers on results.  frontier[2 * index]
+    and frontier[2 * index + 1] hold the best priority in its open list, or
+    inf when it has none.
+    """
+    try:
+        _hdaStarWork(index, workers, problem, heuristic, inboxes, results, frontier)
+    except Exception:
+        import traceback
+        results.put(('error', traceback.format_exc()))
+
+def _hdaStarWork(index, workers, problem, heuristic, inboxes, results, frontier):
+    import queue
+    if hasattr(problem, 'visualize'):
+        problem.visualize = False # Only the parent process may draw
+    startExpanded = getattr(problem, '_expanded', 0)
+    if isinstance(heuristic, MemoizedHeuristic):
+        heuristic.hits = heuristic.misses = 0
+    stats = getattr(problem, '_searchStatistics', None)
+    if stats != None:
+        # Only this worker's counts and samples are sent back, to be added
+        # up; the samples keep timing from the parent's attach
+        startTime = stats.startTime
+        stats.reset()
+        stats.startTime = startTime
+    expandedStates = set() # Kept only for the statistics
+    inbox = inboxes[index]
     fringe = util.PriorityQueue()
-    fringe.push((startState, [], 0), heuristic(startState, problem))
-    visited = []
+    costs = {}
+    links = {} # state -> (parent, action)
+    heuristicValues = {}
+    outgoing = [[] for i in range(workers)]
+    bound = float('inf')
+    sent = received = 0
 
-    while not fringe.isEmpty():
-        state, path, currCost = fringe.pop()
-        if problem.isGoalState(state):
-            return path
-        if state not in visited:
-            succList = problem.getSuccessors(state)
-            for action, cost, nextState in succList:
-                fringe.push((nextState, path + [action], cost+currCost), cost+currCost + heuristic(nextState, problem))
-            visited.append(state)
+    def add(state, g, parent, action):
+        if state in costs and costs[state] <= g:
+            if stats != None: stats.duplicates += 1
+            return
+        if stats != None and state in expandedStates:
+            stats.reopened += 1
+            expandedStates.remove(state)
+        costs[state] = g
+        links[state] = (parent, action)
+        if state not in heuristicValues:
+            heuristicValues[state] = heuristic(state, problem)
+        f = g + heuristicValues[state]
+        if f < bound:
+            fringe.push((state, g), (f, -g))
+
+    def hasWork():
+        # Drops stale entries and those that cannot lead to a cheaper plan
+        while not fringe.isEmpty():
+            priority, count, (state, g) = fringe.heap[0]
+            if g == costs[state] and priority[0] < bound:
+                return True
+            fringe.pop()
+        return False
+
+    def publish(priority):
+        frontier[2 * index], frontier[2 * index + 1] = priority
+
+    def throttled():
+        # Publishes the best priority here, and whether another worker's is better
+        if not hasWork():
+            publish((float('inf'), float('inf')))
+            return False
+        priority = fringe.heap[0][0]
+        publish(priority)
+        return any([(frontier[2 * other], frontier[2 * other + 1]) < priority for other in range(workers)])
+
+    while True:
+        for i in range(HDA_BATCH_SIZE):
+            if not hasWork() or throttled(): break
+            state, g = fringe.pop()
+            if problem.isGoalState(state):
+                bound = g
+                results.put(('goal', state, g))
+                for other in range(workers):
+                    if other != index: inboxes[other].put(('bound', g))
+                continue
+            if stats != None:
+                expandedStates.add(state)
+                stats.updateFringe(len(fringe))
+            for action, stepCost, nextState in problem.getSuccessors(state):
+                owner = hash(nextState) % workers
+                if owner == index:
+                    add(nextState, g + stepCost, state, action)
+                else:
+                    outgoing[owner].append((nextState, g + stepCost, state, action))
+        for owner in range(workers):
+            if outgoing[owner]:
+                inboxes[owner].put(('nodes', outgoing[owner]))
+                outgoing[owner] = []
+                sent += 1
+
+        # Wait for messages when there is nothing left to expand, and
+        # briefly when other workers have cheaper states to expand first
+        wait, timeout = True, None
+        if hasWork():
+            wait, timeout = throttled(), HDA_THROTTLE_WAIT
+        else:
+            publish((float('inf'), float('inf')))
+        while True:
+            try:
+                message = inbox.get(wait, timeout)
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'nodes':
+                received += 1
+                for node in message[1]:
+                    add(*node)
+            elif kind == 'bound':
+                bound = min(bound, message[1])
+            elif kind == 'probe':
+                results.put(('status', message[1], not hasWork(), sent, received))
+            elif kind == 'parent':
+                results.put(('parent',) + links[message[1]])
+            elif kind == 'stop':
+                hits = misses = 0
+                if isinstance(heuristic, MemoizedHeuristic):
+                    hits, misses = heuristic.hits, heuristic.misses
+                counters = samples = None
+                if stats != None: counters, samples = stats.getCounters(), stats.samples
+                results.put(('stopped', getattr(problem, '_expanded', 0) - startExpanded, hits, misses, counters, samples))
+                return
+            wait = False
+
+class BidirectionalSearchProblem(SearchProblem):
+    """
+    An optional extension of SearchProblem for problems with a single goal
+    state whose successor function can be run backwards.
+    bidirectionalBreadthFirstSearch and bidirectionalAStarSearch search
+    forward from the start state and backward from the goal state at once.
+    """
+
+    def getGoalState(self):
+        """
+        Returns the only state for which isGoalState is True.
+        """
+        util.raiseNotDefined()
+
+    def getPredecessors(self, state):
+        """
+          state: Search state
+
+        Returns a list of triples, (action, stepCost, predecessor), where
+        'action' leads from 'predecessor' to state at a cost of 'stepCost'.
+        Counts an expansion, like getSuccessors.
+        """
+        util.raiseNotDefined()
+
+class ReverseSearchProblem(SearchProblem):
+    """
+    A BidirectionalSearchProblem seen backwards: it starts at the goal, its
+    goal is the start, and its successors are the predecessors of the
+    original problem.  goal holds the original start state, so heuristics
+    that read problem.goal, such as manhattanHeuristic, estimate the
+    distance back to the start.  Other attributes are the original's.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.goal = problem.getStartState()
+
+    def getStartState(self):
+        return self.problem.getGoalState()
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+    def getSuccessors(self, state):
+        return self.problem.getPredecessors(state)
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+def joinPlans(forward, backward, state):
+    """
+    Returns the actions from the start to state, following the
+    (parent, action) links of forward, then from state to the goal,
+    following the (child, action) links of backward.
+    """
+    plan = []
+    link = forward[state]
+    while link is not None:
+        plan.append(link[1])
+        link = forward[link[0]]
+    plan.reverse()
+    link = backward[state]
+    while link is not None:
+        plan.append(link[1])
+        link = backward[link[0]]
+    return plan
+
+def bidirectionalBreadthFirstSearch(problem):
+    """
+    Breadth first search from the start and from the goal at once, always
+    expanding a whole layer of the smaller frontier.  Once a layer reaches a
+    state the other side has seen, the shortest plan through such a state is
+    a plan with the fewest actions.  Each frontier only grows to about half
+    the plan length, instead of the whole of it.
+    """
+    if not isinstance(problem, BidirectionalSearchProblem):
+        raise Exception('bidirectional search needs a BidirectionalSearchProblem')
+    startState = problem.getStartState()
+    goalState = problem.getGoalState()
+    # state -> (parent, action) forward and (child, action) backward
+    forward, backward = {startState: None}, {goalState: None}
+    depth = [{startState: 0}, {goalState: 0}]
+    if startState in backward:
+        return []
+
+    layers = [[startState], [goalState]]
+    stats = getattr(problem, '_searchStatistics', None)
+    while layers[0] and layers[1]:
+        side = 0 if len(layers[0]) <= len(layers[1]) else 1
+        if side == 0:
+            links, otherLinks, expand = forward, backward, problem.getSuccessors
+        else:
+            links, otherLinks, expand = backward, forward, problem.getPredecessors
+        depths, otherDepths = depth[side], depth[1 - side]
+        nextLayer, meeting, shortest = [], None, float('inf')
+        for state in layers[side]:
+            nextDepth = depths[state] + 1
+            for action, stepCost, nextState in expand(state):
+                if nextState in links:
+                    if stats != None: stats.duplicates += 1
+                    continue
+                links[nextState] = (state, action)
+                depths[nextState] = nextDepth
+                nextLayer.append(nextState)
+                if nextState in otherLinks and nextDepth + otherDepths[nextState] < shortest:
+                    meeting, shortest = nextState, nextDepth + otherDepths[nextState]
+        if stats != None: stats.updateFringe(len(nextLayer) + len(layers[1 - side]))
+        if meeting is not None:
+            return joinPlans(forward, backward, meeting)
+        layers[side] = nextLayer
+    return None
+
+def bidirectionalAStarSearch(problem, heuristic=nullHeuristic):
+    """
+    The MM bidirectional heuristic search (Holte et al., 2016): A* from the
+    start and, with heuristic(state, ReverseSearchProblem(problem)), from
+    the goal, where a state's priority is max(g + h, 2g).  The side with the
+    lower priority is expanded, so the two searches meet in the middle.
+    Once the cheapest plan through a state reached from both sides costs no
+    more than the lowest priority left, it is returned.  With an admissible
+    heuristic the plan is optimal.
+    """
+    if not isinstance(problem, BidirectionalSearchProblem):
+        raise Exception('bidirectional search needs a BidirectionalSearchProblem')
+    problems = [problem, ReverseSearchProblem(problem)]
+    expand = [problem.getSuccessors, problem.getPredecessors]
+    startState = problem.getStartState()
+    goalState = problem.getGoalState()
+    # state -> (parent, action) forward and (child, action) backward
+    links = [{startState: None}, {goalState: None}]
+    costs = [{startState: 0}, {goalState: 0}]
+    fringes = [util.PriorityQueue(), util.PriorityQueue()]
+    for side, state in [(0, startState), (1, goalState)]:
+        fringes[side].push((state, 0), heuristic(state, problems[side]))
+
+    meeting, bestCost = None, float('inf')
+    if startState in costs[1]:
+        meeting, bestCost = startState, 0
+    stats = getattr(problem, '_searchStatistics', None)
+    while True:
+        # Drop entries superseded by a cheaper path to the same state
+        for side in (0, 1):
+            heap = fringes[side].heap
+            while heap and heap[0][2][1] > costs[side][heap[0][2][0]]:
+                fringes[side].pop()
+                if stats != None: stats.duplicates += 1
+        if fringes[0].isEmpty() or fringes[1].isEmpty():
+            break
+        lowest = min(fringes[0].heap[0][0], fringes[1].heap[0][0])
+        if bestCost <= lowest:
+            break
+
+        side = 0 if fringes[0].heap[0][0] <= fringes[1].heap[0][0] else 1
+        state, g = fringes[side].pop()
+        sideCosts, otherCosts = costs[side], costs[1 - side]
+        for action, stepCost, nextState in expand[side](state):
+            nextCost = g + stepCost
+            if nextState in sideCosts and sideCosts[nextState] <= nextCost:
+                if stats != None: stats.duplicates += 1
+                continue
+            sideCosts[nextState] = nextCost
+            links[side][nextState] = (state, action)
+            h = heuristic(nextState, problems[side])
+            fringes[side].push((nextState, nextCost), max(nextCost + h, 2 * nextCost))
+            if nextState in otherCosts and nextCost + otherCosts[nextState] < bestCost:
+                meeting, bestCost = nextState, nextCost + otherCosts[nextState]
+        if stats != None: stats.updateFringe(len(fringes[0]) + len(fringes[1]))
+
+    if meeting is None:
+        return None
+    return joinPlans(links[0], links[1], meeting)
+
+class InPlaceSearchProblem(SearchProblem):
+    """
+    An optional extension of SearchProblem for problems whose states can be
+    changed in place.  idaStarSearch and recursiveBestFirstSearch use it to
+    walk the search tree by making and unmaking moves on a single state, so
+    no successor state is allocated per node.  isGoalState and heuristics
+    are called with that mutable state.
+    """
+
+    def getInPlaceStartState(self):
+        """
+        Returns a new mutable copy of the start state.
+        """
+        util.raiseNotDefined()
+
+    def getMoves(self, state):
+        """
+          state: Mutable search state
+
+        Returns a sequence of (action, stepCost) pairs for the legal actions
+        in state, and counts an expansion.
+        """
+        util.raiseNotDefined()
+
+    def applyMove(self, state, action):
+        """
+        Changes state into its successor under action and returns a token
+        that undoMove uses to change it back.
+        """
+        util.raiseNotDefined()
+
+    def undoMove(self, state, token):
+        """
+        Reverts the applyMove that returned token.
+        """
+        util.raiseNotDefined()
+
+    def reverseAction(self, action):
+        """
+        Returns the action that undoes action, or None.  The searches never
+        take it straight after action, which prunes the shortest cycles.
+        """
+        return None
+
+FOUND = -1 # Returned by the memory-bounded searches once a goal is reached
+
+def idaStarSearch(problem, heuristic=nullHeuristic):
+    """
+    Iterative deepening A*: a series of depth first searches, each cut off
+    where g + h exceeds a bound, which then grows to the smallest g + h seen
+    beyond it.  Memory is linear in the plan length.  With an admissible
+    heuristic the plan is optimal.
+
+    InPlaceSearchProblems are searched by making and unmaking moves on one
+    state; other problems through getSuccessors, skipping states already on
+    the current path.
+    """
+    plan = []
+    inPlace = isinstance(problem, InPlaceSearchProblem)
+    stats = getattr(problem, '_searchStatistics', None)
+
+    def searchInPlace(state, g, bound, forbidden):
+        f = g + heuristic(state, problem)
+        if f > bound: return f
+        if problem.isGoalState(state): return FOUND
+        if stats != None: stats.updateFringe(len(plan))
+        minimum = float('inf')
+        for action, stepCost in problem.getMoves(state):
+            if action == forbidden:
+                if stats != None: stats.duplicates += 1
+                continue
+            token = problem.applyMove(state, action)
+            plan.append(action)
+            t = searchInPlace(state, g + stepCost, bound, problem.reverseAction(action))
+            if t == FOUND: return FOUND
+            plan.pop()
+            problem.undoMove(state, token)
+            if t < minimum: minimum = t
+        return minimum
+
+    def searchSuccessors(state, g, bound, onPath):
+        f = g + heuristic(state, problem)
+        if f > bound: return f
+        if problem.isGoalState(state): return FOUND
+        if stats != None: stats.updateFringe(len(plan))
+        minimum = float('inf')
+        for action, stepCost, nextState in problem.getSuccessors(state):
+            if nextState in onPath:
+                if stats != None: stats.duplicates += 1
+                continue
+            onPath.add(nextState)
+            plan.append(action)
+            t = searchSuccessors(nextState, g + stepCost, bound, onPath)
+            if t == FOUND: return FOUND
+            plan.pop()
+            onPath.remove(nextState)
+            if t < minimum: minimum = t
+        return minimum
+
+    if inPlace:
+        state = problem.getInPlaceStartState()
+    else:
+        state = problem.getStartState()
+    bound = heuristic(state, problem)
+    while True:
+        if inPlace:
+            t = searchInPlace(state, 0, bound, None)
+        else:
+            t = searchSuccessors(state, 0, bound, set([state]))
+        if t == FOUND: return plan
+        if t == float('inf'): return None
+        bound = t
+
+def recursiveBestFirstSearch(problem, heuristic=nullHeuristic):
+    """
+    Recursive best-first search (Korf): a best-first search that keeps only
+    the current path and the siblings along it.  When the best child's f
+    exceeds the best alternative higher up, the subtree is abandoned and its
+    f value backed up to the child.  Memory is linear in the plan length.
+    With an admissible heuristic the plan is optimal.
+
+    InPlaceSearchProblems are searched by making and unmaking moves on one
+    state (children are scored by applying, evaluating and undoing each
+    move); other problems through getSuccessors, skipping states already on
+    the current path.
+    """
+    plan = []
+    inPlace = isinstance(problem, InPlaceSearchProblem)
+    infinity = float('inf')
+    stats = getattr(problem, '_searchStatistics', None)
+
+    # context is the reverse of the last action for in-place problems, and
+    # the set of states on the current path otherwise
+    def search(state, g, f, fLimit, context):
+        if problem.isGoalState(state): return FOUND
+        if stats != None: stats.updateFringe(len(plan))
+        # children are [f, action, stepCost, nextState], f inherited from the parent when larger
+        children = []
+        if inPlace:
+            for action, stepCost in problem.getMoves(state):
+                if action == context:
+                    if stats != None: stats.duplicates += 1
+                    continue
+                token = problem.applyMove(state, action)
+                children.append([max(g + stepCost + heuristic(state, problem), f), action, stepCost, None])
+                problem.undoMove(state, token)
+        else:
+            for action, stepCost, nextState in problem.getSuccessors(state):
+                if nextState in context:
+                    if stats != None: stats.duplicates += 1
+                    continue
+                children.append([max(g + stepCost + heuristic(nextState, problem), f), action, stepCost, nextState])
+        if not children: return infinity
+
+        while True:
+            best = min(children, key=lambda child: child[0])
+            if best[0] > fLimit or best[0] == infinity: return best[0]
+            alternative = min([child[0] for child in children if child is not best] or [infinity])
+            action, stepCost, nextState = best[1:]
+            plan.append(action)
+            if inPlace:
+                token = problem.applyMove(state, action)
+                t = search(state, g + stepCost, best[0], min(fLimit, alternative), problem.reverseAction(action))
+            else:
+                context.add(nextState)
+                t = search(nextState, g + stepCost, best[0], min(fLimit, alternative), context)
+            if t == FOUND: return FOUND
+            plan.pop()
+            if inPlace:
+                problem.undoMove(state, token)
+            else:
+                context.remove(nextState)
+            best[0] = t
+
+    if inPlace:
+        state = problem.getInPlaceStartState()
+        context = None
+    else:
+        state = problem.getStartState()
+        context = set([state])
+    if search(state, 0, heuristic(state, problem), infinity, context) == FOUND:
+        return plan
+    return None
+
+
+# Records externalAStarSearch sorts in memory at once
+EXTERNAL_CHUNK_RECORDS = 1 << 20
+
+class ExternalSearchProblem(SearchProblem):
+    """
+    A search problem whose states have a compact fixed-width encoding, so
+    that externalAStarSearch can keep its open and closed lists on disk.
+    """
+
+    def getStateSize(self):
+        "Returns the number of bytes of an encoded state"
+        util.raiseNotDefined()
+
+    def encodeState(self, state):
+        "Returns state encoded as an int from 0 to 256 ** getStateSize() - 1"
+        util.raiseNotDefined()
+
+    def decodeState(self, code):
+        "Returns the state that encodeState encoded as code"
+        util.raiseNotDefined()
+
+def externalAStarSearch(problem, heuristic=nullHeuristic, directory=None, chunkRecords=EXTERNAL_CHUNK_RECORDS):
+    """
+    External memory A* (Edelkamp, Jabbar and Schroedl) for an
+    ExternalSearchProblem with positive step costs and a consistent
+    heuristic, keeping its states in files instead of memory.
+
+    Generated states are appended, with their parents, to the file of their
+    bucket of equal g and h as fixed-width records.  Buckets are taken in
+    order of f = g + h and then g, and only then are duplicates detected:
+    the bucket is sorted, chunkRecords records at a time with the sorted
+    runs merged afterwards, and the states already in the sorted closed
+    file of the same h are dropped while the others are merged into it.  A
+    state always has the same h, so no other closed file can hold it.  The
+    first goal taken is an optimal one, and the plan is rebuilt by looking
+    each parent up in its closed file by binary search.
+
+    The files go to a temporary directory inside directory, or the system's
+    default one, and are deleted afterwards.  The number of distinct states
+    stored is set as problem._externalStates.
+    """
+    import shutil, tempfile
+    workDirectory = tempfile.mkdtemp(prefix='externalSearch', dir=directory)
+    try:
+        return ExternalAStar(problem, heuristic, workDirectory, chunkRecords).search()
+    finally:
+        shutil.rmtree(workDirectory, ignore_errors=True)
+
+class ExternalAStar:
+    """
+    The files of one externalAStarSearch in directory.  A record is the
+    big-endian encoding of a state followed by that of its parent; the start
+    state is its own parent.  Buckets are only written to files once more
+    than chunkRecords records are held, so small searches barely touch the
+    disk.
+    """
+    def __init__(self, problem, heuristic, directory, chunkRecords):
+        self.problem = problem
+        self.heuristic = heuristic
+        self.directory = directory
+        self.chunkRecords = chunkRecords
+        self.stateSize = problem.getStateSize()
+        self.recordSize = 2 * self.stateSize
+        self.buckets = {} # (g, h) -> [path or None, records not yet written]
+        self.order = [] # a heap of (f, g, h) for the buckets
+        self.buffered = 0
+        self.closed = {} # h -> path of the closed records sorted by state
+        self.fileCount = 0
+        self.openRecords = 0
+        self.stats = getattr(problem, '_searchStatistics', None)
+
+    def search(self):
+        problem, heuristic, size = self.problem, self.heuristic, self.stateSize
+        start = problem.getStartState()
+        startKey = self.encode(start)
+        self.add(0, heuristic(start, problem), startKey + startKey)
+        problem._externalStates = 0
+        while self.order:
+            f, g, h = heapq.heappop(self.order)
+            newPath, newRecords = self.closeBucket(h, self.buckets.pop((g, h)))
+            if newPath != None:
+                newRecords = itertools.chain(self.readRecords(newPath), newRecords)
+            for record in newRecords:
+                problem._externalStates += 1
+                key = record[:size]
+                state = self.decode(key)
+                if problem.isGoalState(state):
+                    return self.rebuildPlan(record)
+                for action, stepCost, nextState in problem.getSuccessors(state):
+                    self.add(g + stepCost, heuristic(nextState, problem), self.encode(nextState) + key)
+            if newPath != None:
+                os.remove(newPath)
+            if self.stats != None: self.stats.updateFringe(self.openRecords)
+        return None
+
+    def encode(self, state):
+        return self.problem.encodeState(state).to_bytes(self.stateSize, 'big')
+
+    def decode(self, key):
+        return self.problem.decodeState(int.from_bytes(key, 'big'))
+
+    def newPath(self):
+        self.fileCount += 1
+        return os.path.join(self.directory, '%d.records' % self.fileCount)
+
+    def add(self, g, h, record):
+        "Adds record to the bucket (g, h), writing out all buckets once chunkRecords are held"
+        if (g, h) not in self.buckets:
+            self.buckets[(g, h)] = [None, []]
+            heapq.heappush(self.order, (g + h, g, h))
+        self.buckets[(g, h)][1].append(record)
+        self.buffered += 1
+        self.openRecords += 1
+        if self.buffered >= self.chunkRecords:
+            for bucket in self.buckets.values():
+                self.writeBucket(bucket)
+
+    def writeBucket(self, bucket):
+        if not bucket[1]: return
+        if bucket[0] == None:
+            bucket[0] = self.newPath()
+        f = open(bucket[0], 'ab')
+        try:
+            f.write(b''.join(bucket[1]))
+        finally:
+            f.close()
+        self.buffered -= len(bucket[1])
+        bucket[1] = []
+
+    def readRecords(self, path):
+        "Yields the records in the file at path"
+        recordSize = self.recordSize
+        f = open(path, 'rb')
+        try:
+            while True:
+                data = f.read(4096 * recordSize)
+                if not data: return
+                for i in range(0, len(data), recordSize):
+                    yield data[i:i + recordSize]
+        finally:
+            f.close()
+
+    def sortBucket(self, bucket):
+        """
+        Returns a list of sorted runs of the bucket's records, and the paths
+        of the files holding them.  A bucket that was never written out is
+        sorted in memory; otherwise its file is sorted chunkRecords records
+        at a time into run files and deleted.
+        """
+        path, records = bucket
+        if path == None:
+            self.buffered -= len(records)
+            records.sort()
+            return [records], []
+        self.writeBucket(bucket)
+        recordSize = self.recordSize
+        runPaths = []
+        f = open(path, 'rb')
+        try:
+            while True:
+                data = f.read(self.chunkRecords * recordSize)
+                if not data: break
+                records = [data[i:i + recordSize] for i in range(0, len(data), recordSize)]
+                records.sort()
+                runPaths.append(self.newPath())
+                out = open(runPaths[-1], 'wb')
+                try:
+                    out.write(b''.join(records))
+                finally:
+                    out.close()
+        finally:
+            f.close()
+        os.remove(path)
+        return [self.readRecords(runPath) for runPath in runPaths], runPaths
+
+    def closeBucket(self, h, bucket):
+        """
+        Merges the sorted records of a bucket of heuristic value h into the
+        closed file of h, keeping one record per state.  Returns the records
+        of the states that were not closed before: up to chunkRecords of
+        them in a list, after any others in a file whose path is returned
+        too, or None.
+        """
+        size = self.stateSize
+        runs, runPaths = self.sortBucket(bucket)
+        oldPath = self.closed.get(h)
+        if oldPath != None:
+            closed = self.readRecords(oldPath)
+        else:
+            closed = iter(())
+        mergedPath = self.newPath()
+        mergedFile = open(mergedPath, 'wb')
+        newPath, newFile, newRecords = None, None, []
+        try:
+            nextClosed = next(closed, None)
+            lastKey = None
+            for record in heapq.merge(*runs):
+                self.openRecords -= 1
+                key = record[:size]
+                if key == lastKey:
+                    if self.stats != None: self.stats.duplicates += 1
+                    continue
+                lastKey = key
+                while nextClosed != None and nextClosed[:size] < key:
+                    mergedFile.write(nextClosed)
+                    nextClosed = next(closed, None)
+                if nextClosed != None and nextClosed[:size] == key:
+                    if self.stats != None: self.stats.duplicates += 1
+                    continue
+                mergedFile.write(record)
+                newRecords.append(record)
+                if len(newRecords) >= self.chunkRecords:
+                    if newFile == None:
+                        newPath = self.newPath()
+                        newFile = open(newPath, 'wb')
+                    newFile.write(b''.join(newRecords))
+                    newRecords = []
+            while nextClosed != None:
+                mergedFile.write(nextClosed)
+                nextClosed = next(closed, None)
+        finally:
+            mergedFile.close()
+            if newFile != None: newFile.close()
+        for runPath in runPaths: os.remove(runPath)
+        if oldPath != None: os.remove(oldPath)
+        self.closed[h] = mergedPath
+        return newPath, newRecords
+
+    def findClosed(self, h, key):
+        "Returns the closed record of the state encoded as key, of heuristic value h"
+        size, recordSize = self.stateSize, self.recordSize
+        path = self.closed[h]
+        f = open(path, 'rb')
+        try:
+            low, high = 0, os.path.getsize(path) // recordSize
+            while low < high:
+                middle = (low + high) // 2
+                f.seek(middle * recordSize)
+                if f.read(size) < key:
+                    low = middle + 1
+                else:
+                    high = middle
+            f.seek(low * recordSize)
+            return f.read(recordSize)
+        finally:
+            f.close()
+
+    def rebuildPlan(self, record):
+        "Returns the actions leading from the start state to the state of record"
+        problem, size = self.problem, self.stateSize
+        # Finding the actions again is not part of the search
+        expanded = getattr(problem, '_expanded', None)
+        if self.stats != None:
+            counted = self.stats.expanded, self.stats.generated
+        plan = []
+        key, parentKey = record[:size], record[size:]
+        while parentKey != key:
+            parent = self.decode(parentKey)
+            for action, stepCost, nextState in problem.getSuccessors(parent):
+                if self.encode(nextState) == key: break
+            plan.append(action)
+            record = self.findClosed(self.heuristic(parent, problem), parentKey)
+            key, parentKey = record[:size], record[size:]
+        if expanded != None:
+            problem._expanded = expanded
+        if self.stats != None:
+            self.stats.expanded, self.stats.generated = counted
+        plan.reverse()
+        return plan
 
 
 # Abbreviations
@@ -202,3 +1443,11 @@ bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bibfs = bidirectionalBreadthFirstSearch
+biastar = bidirectionalAStarSearch
+jps = jumpPointSearch
+arastar = anytimeRepairingAStarSearch
+hdastar = hashDistributedAStarSearch
+extastar = externalAStarSearch
+idastar = idaStarSearch
+rbfs = recursiveBestFirstSearch
@@ -37,9 +37,17 @@ Good luck and happy searching!
 from game import Directions
 from game import Agent
 from game import Actions
+from game import BitGrid
 import util
 import time
 import search
+import mazeDistances
+
+try:
+    import numpy
+except ImportError:
+    # ExactFoodTourAgent then runs its dynamic program in plain Python
+    numpy = None
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -69,20 +77,52 @@ class SearchAgent(Agent):
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
 
+    The memory-bounded idaStarSearch (idastar) and recursiveBestFirstSearch
+    (rbfs) take a heuristic like aStarSearch.
+
+    For a PositionSearchProblem, bidirectionalBreadthFirstSearch (bibfs) and
+    bidirectionalAStarSearch (biastar, with a heuristic) also search
+    backwards from the goal, and jumpPointSearch (jps, with a heuristic)
+    skips symmetric paths when every step costs 1.
+
+    Any search taking a heuristic also takes cacheHeuristic=N, which computes
+    the heuristic once per state for up to N states (search.MemoizedHeuristic).
+
+    anytimeRepairingAStarSearch (arastar) takes a heuristic and budget=N, a
+    number of seconds to spend improving its first, quickly found plan, for
+    example -a fn=arastar,budget=2.0,heuristic=manhattanHeuristic.
+
+    hashDistributedAStarSearch (hdastar) takes a heuristic and workers=N, the
+    number of processes to spread an A* search over, for example
+    -a fn=hdastar,workers=4,prob=FoodSearchProblem,heuristic=foodHeuristic.
+
+    externalAStarSearch (extastar) keeps the states of a CornersProblem or
+    FoodSearchProblem in files instead of memory, and aStarSearch takes
+    maxStates=N to switch to it once more than N states are in memory.
+
+    searchStats=FILE records search.SearchStatistics of each search, such
+    as expansions, duplicates and heuristic time, to FILE as JSON, or as CSV
+    when FILE ends in .csv; statsInterval=N adds a sample every N
+    expansions.  pacman.py --searchStats FILE sets searchStats.
+
+    uniformCostSearch (ucs) and aStarSearch (astar) also take queue=heap,
+    queue=bucket or queue=bucketlifo to choose their priority queue.  The
+    bucket queues only accept integer path costs and heuristic values.
+
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', queue=None, budget=None, cacheHeuristic=None, workers=None, maxStates=None, searchStats=None, statsInterval=None):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+        searchArgs = {}
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
-            self.searchFunction = func
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -91,8 +131,62 @@ class SearchAgent(Agent):
             else:
                 raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
-            # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            # Optionally compute the heuristic once per state, for up to N states
+            if cacheHeuristic != None:
+                heur = search.MemoizedHeuristic(heur, int(cacheHeuristic))
+                print('[SearchAgent] caching the heuristic for up to %s states' % cacheHeuristic)
+            searchArgs['heuristic'] = heur
+
+        if cacheHeuristic != None and 'heuristic' not in searchArgs:
+            raise AttributeError(fn + ' does not take a heuristic to cache.')
+        self.heuristic = searchArgs.get('heuristic')
+
+        # Optionally pick the priority queue of ucs or astar, e.g. queue=bucket
+        if queue != None:
+            if 'queue' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take a priority queue.')
+            search.makePriorityQueue(queue) # Fail early on an unknown queue type
+            print('[SearchAgent] using %s priority queue' % queue)
+            searchArgs['queue'] = queue
+
+        # Optionally limit the seconds an anytime search spends improving its plan
+        if budget != None:
+            if 'budget' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take a time budget.')
+            print('[SearchAgent] using a budget of %s seconds' % budget)
+            searchArgs['budget'] = float(budget)
+
+        # Optionally spread a parallel search over several processes
+        if workers != None:
+            if 'workers' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take a number of workers.')
+            print('[SearchAgent] using %s worker processes' % workers)
+            searchArgs['workers'] = int(workers)
+
+        # Optionally continue on disk once a search holds too many states
+        if maxStates != None:
+            if 'maxStates' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take a limit on the states in memory.')
+            print('[SearchAgent] keeping at most %s states in memory' % maxStates)
+            searchArgs['maxStates'] = int(maxStates)
+
+        # Optionally record the statistics of each search
+        self.searchStatsPath = searchStats
+        self.statsInterval = None
+        if statsInterval != None:
+            if searchStats == None:
+                raise AttributeError('statsInterval needs searchStats.')
+            self.statsInterval = int(statsInterval)
+        self.statsInfo = {'function': fn, 'problem': prob}
+        self.searchStatistics = []
+        if searchStats != None:
+            print('[SearchAgent] recording search statistics to ' + searchStats)
+            if 'heuristic' in searchArgs:
+                self.statsInfo['heuristic'] = heuristic
+                searchArgs['heuristic'] = search.InstrumentedHeuristic(searchArgs['heuristic'])
+
+        # Note: this bit of Python trickery combines the search algorithm with its options
+        self.searchFunction = lambda x: func(x, **searchArgs)
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -112,10 +206,26 @@ class SearchAgent(Agent):
         if self.searchFunction == None: raise Exception("No search function provided for SearchAgent")
         starttime = time.time()
         problem = self.searchType(state) # Makes a new search problem
+        statsPath = getattr(self, 'searchStatsPath', None)
+        if statsPath != None:
+            stats = search.SearchStatistics(self.statsInterval, self.statsInfo)
+            stats.attach(problem)
         self.actions  = self.searchFunction(problem) # Find a path
+        if statsPath != None:
+            stats.finish()
+            self.searchStatistics.append(stats)
+            search.saveSearchStatistics(self.searchStatistics, statsPath)
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if isinstance(getattr(self, 'heuristic', None), search.MemoizedHeuristic):
+            print('Heuristic cache: %d hits, %d misses' % (self.heuristic.hits, self.heuristic.misses))
+        if '_suboptimalityBound' in dir(problem):
+            print('Plan cost is at most %.3f times the optimal' % problem._suboptimalityBound)
+        if '_externalStates' in dir(problem):
+            print('States stored on disk: %d' % problem._externalStates)
+        if getattr(problem, '_expandedBackward', 0):
+            print('Of those, expanded backwards from the goal: %d' % problem._expandedBackward)
 
     def getAction(self, state):
         """
@@ -133,7 +243,11 @@ class SearchAgent(Agent):
         else:
             return Directions.STOP
 
-class PositionSearchProblem(search.SearchProblem):
+def unitCost(position):
+    "The default cost function of the search problems: every step costs 1"
+    return 1
+
+class PositionSearchProblem(search.BidirectionalSearchProblem):
     """
     A search problem defines the state space, start state, goal test, successor
     function and cost function.  This search problem can be used to find paths
@@ -141,10 +255,13 @@ class PositionSearchProblem(search.SearchProblem):
 
     The state space consists of (x,y) positions in a pacman game.
 
+    Moves are reversible, so the problem can also be searched backwards from
+    its goal by the bidirectional searches (fn=bibfs or fn=biastar).
+
     Note: this search problem is fully specified; you should NOT change it.
     """
 
-    def __init__(self, gameState, costFn = lambda x: 1, goal=(1,1), start=None, warn=True, visualize=True):
+    def __init__(self, gameState, costFn = unitCost, goal=(1,1), start=None, warn=True, visualize=True):
         """
         Stores the start and goal.
 
@@ -153,6 +270,7 @@ class PositionSearchProblem(search.SearchProblem):
         goal: A position in the gameState
         """
         self.walls = gameState.getWalls()
+        self.successorTable = Actions.getSuccessorTable(self.walls)
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
@@ -163,10 +281,20 @@ class PositionSearchProblem(search.SearchProblem):
 
         # For display purposes
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
+        # The part of _expanded done backwards from the goal
+        self._expandedBackward = 0
 
     def getStartState(self):
         return self.startState
 
+    def getGoalState(self):
+        return self.goal
+
+    def getJumpPointProblem(self):
+        "Returns a JumpPointProblem for this problem, or None unless every step costs 1"
+        if self.costFn is not unitCost: return None
+        return JumpPointProblem(self)
+
     def isGoalState(self, state):
         isGoal = state == self.goal
 
@@ -192,15 +320,12 @@ class PositionSearchProblem(search.SearchProblem):
          successor to the current state.
         """
 
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append( ( action, cost, nextState) )
+        # The legal moves come from the layout's precomputed successor table;
+        # costFn is only called when it is not the default unit cost
+        if self.costFn is unitCost:
+            successors = [(action, 1, nextState) for action, nextState in self.successorTable[state]]
+        else:
+            successors = [(action, self.costFn(nextState), nextState) for action, nextState in self.successorTable[state]]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -210,6 +335,27 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getPredecessors(self, state):
+        """
+        Returns the cells one move away from state, the actions that lead
+        from them to state, and the cost of entering state.
+        """
+        reverse = Actions.reverseDirection
+        if self.costFn is unitCost:
+            cost = 1
+        else:
+            cost = self.costFn(state)
+        predecessors = [(reverse(action), cost, previousState) for action, previousState in self.successorTable[state]]
+
+        # Bookkeeping for display purposes
+        self._expanded += 1
+        self._expandedBackward += 1
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -226,6 +372,101 @@ class PositionSearchProblem(search.SearchProblem):
             cost += self.costFn((x,y))
         return cost
 
+class JumpPointProblem(search.SearchProblem):
+    """
+    Jump point search (Harabor and Grastien) adapted to the four moves of a
+    unit cost PositionSearchProblem.
+
+    Of the many equally short paths across open space, only canonical ones
+    are searched: those that never move vertically and then horizontally
+    where the horizontal move could have come first.  A vertical move is
+    therefore only followed by a horizontal one where the cell beside the
+    cell it came from is a wall, and straight runs need no stops except
+    where such a turn, or the goal, becomes possible.  A successor is the
+    next such jump point in a direction, reached by a straight run.
+
+    States are (position, direction of the last run) pairs and actions are
+    tuples of the primitive moves of a run, which cost their length.
+    Expansions are counted on the PositionSearchProblem.
+    """
+    _vectors = {Directions.NORTH: (0, 1), Directions.SOUTH: (0, -1),
+                Directions.EAST: (1, 0), Directions.WEST: (-1, 0)}
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.walls = problem.walls
+        self.goal = problem.getGoalState()
+
+    def getStartState(self):
+        return (self.problem.getStartState(), None)
+
+    def isGoalState(self, state):
+        return self.problem.isGoalState(state[0])
+
+    def getSuccessors(self, state):
+        position, direction = state
+        successors = []
+        for nextDirection in self.getDirections(position, direction):
+            jump = self.jump(position, nextDirection)
+            if jump != None:
+                nextPosition, distance = jump
+                successors.append(((nextDirection,) * distance, distance, (nextPosition, nextDirection)))
+
+        # Bookkeeping for display purposes
+        problem = self.problem
+        problem._expanded += 1
+        if position not in problem._visited:
+            problem._visited[position] = True
+            problem._visitedlist.append(position)
+
+        return successors
+
+    def getDirections(self, position, direction):
+        "The directions a canonical path can take from position after direction"
+        if direction == None:
+            return [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+        if direction == Directions.EAST or direction == Directions.WEST:
+            return [direction, Directions.NORTH, Directions.SOUTH]
+        x, y = position
+        dy = self._vectors[direction][1]
+        directions = [direction]
+        for turn in (Directions.EAST, Directions.WEST):
+            dx = self._vectors[turn][0]
+            if self.walls[x + dx][y - dy] and not self.walls[x + dx][y]:
+                directions.append(turn)
+        return directions
+
+    def jump(self, position, direction):
+        """
+        Runs from position in direction and returns the first jump point and
+        its distance, or None when a wall comes first.
+        """
+        walls, goal = self.walls, self.goal
+        dx, dy = self._vectors[direction]
+        x, y = position
+        distance = 0
+        while True:
+            x, y = x + dx, y + dy
+            distance += 1
+            if walls[x][y]: return None
+            if (x, y) == goal: return (x, y), distance
+            if dx == 0:
+                # A horizontal turn is forced where a wall beside the last cell ends
+                if (walls[x + 1][y - dy] and not walls[x + 1][y]) or (walls[x - 1][y - dy] and not walls[x - 1][y]):
+                    return (x, y), distance
+            elif self.jumpsVertically(x, y, 1) or self.jumpsVertically(x, y, -1):
+                return (x, y), distance
+
+    def jumpsVertically(self, x, y, dy):
+        "Whether a vertical run from (x, y) reaches a jump point"
+        walls, goal = self.walls, self.goal
+        while True:
+            y += dy
+            if walls[x][y]: return False
+            if (x, y) == goal: return True
+            if (walls[x + 1][y - dy] and not walls[x + 1][y]) or (walls[x - 1][y - dy] and not walls[x - 1][y]):
+                return True
+
 class StayEastSearchAgent(SearchAgent):
     """
     An agent for position search with a cost function that penalizes being in
@@ -266,11 +507,14 @@ def euclideanHeuristic(position, problem, info={}):
 # This portion is incomplete.  Time to write code!  #
 #####################################################
 
-class CornersProblem(search.SearchProblem):
+class CornersProblem(search.ExternalSearchProblem):
     """
     This search problem finds paths through all four corners of a layout.
 
     You must select a suitable state space and successor function
+
+    States are encoded as the number of Pacman's cell followed by a bit per
+    corner, for search.externalAStarSearch.
     """
 
     def __init__(self, startingGameState):
@@ -288,7 +532,9 @@ class CornersProblem(search.SearchProblem):
         # Please add any code here which you would like to use
         # in initializing the problem
         "*** YOUR CODE HERE ***"
-        self.costFn = lambda x: 1
+        self.costFn = unitCost
+        self.successorTable = Actions.getSuccessorTable(self.walls)
+        self.cells, self.cellIndex = cellTable(self.walls)[:2]
         "python pacman.py -l tinyCorners -p SearchAgent -a fn=bfs,prob=CornersProblem"
 
     def getStartState(self):
@@ -323,27 +569,22 @@ class CornersProblem(search.SearchProblem):
         """
 
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            # Add a successor state to the successor list if the action is legal
-            # Here's a code snippet for figuring out whether a new position hits a wall:
-            #   x,y = currentPosition
-            #   dx, dy = Actions.directionToVector(action)
-            #   nextx, nexty = int(x + dx), int(y + dy)
-            #   hitsWall = self.walls[nextx][nexty]
-            "*** YOUR CODE HERE ***"
-            x, y = state[0]
-            visited = list(state[1])
-            for index in self.corners:
-                if (x, y) == self.corners[index]:
-                    visited[index] = True
-                    break
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty), tuple(visited)
-                cost = self.costFn(nextState)
-                successors.append((action, cost, nextState))
-                
+        "*** YOUR CODE HERE ***"
+        position = state[0]
+        visited = list(state[1])
+        for index in self.corners:
+            if position == self.corners[index]:
+                visited[index] = True
+                break
+        visited = tuple(visited)
+        # Legal moves come from the layout's precomputed successor table
+        for action, nextPosition in self.successorTable[position]:
+            nextState = nextPosition, visited
+            if self.costFn is unitCost:
+                successors.append((action, 1, nextState))
+            else:
+                successors.append((action, self.costFn(nextState), nextState))
+
         self._expanded += 1 # DO NOT CHANGE
         return successors
 
@@ -360,6 +601,20 @@ class CornersProblem(search.SearchProblem):
             if self.walls[x][y]: return 999999
         return len(actions)
 
+    def getStateSize(self):
+        return packedStateSize(len(self.cells), len(self.corners))
+
+    def encodeState(self, state):
+        position, visited = state
+        code = self.cellIndex[position]
+        for index in range(len(self.corners) - 1, -1, -1):
+            code = code << 1 | visited[index]
+        return code
+
+    def decodeState(self, code):
+        visited = tuple([bool(code >> index & 1) for index in range(len(self.corners))])
+        return self.cells[code >> len(self.corners)], visited
+
 
 def cornersHeuristic(state, problem):
     """
@@ -396,7 +651,53 @@ class AStarCornersAgent(SearchAgent):
         self.searchFunction = lambda prob: search.aStarSearch(prob, cornersHeuristic)
         self.searchType = CornersProblem
 
-class FoodSearchProblem:
+class CompactCornersProblem(CornersProblem):
+    """
+    The CornersProblem with states packed into plain ints.
+
+    A state is ( cellIndex, visitedMask ) where cellIndex numbers Pacman's
+    cell (see cellTable) and bit i of visitedMask is the visited flag of
+    corner i in the ( position, visitedCorners ) state of CornersProblem.
+    The two state spaces correspond one to one, so searches expand the same
+    nodes in the same order.  Use toPublicState, or publicStateHeuristic,
+    for heuristics written for CornersProblem states.
+    """
+
+    def __init__(self, startingGameState):
+        CornersProblem.__init__(self, startingGameState)
+        self.successorTable = cellTable(self.walls)[2]
+        self.cornerBits = [0] * len(self.cells)
+        for index in self.corners:
+            if self.corners[index] in self.cellIndex:
+                self.cornerBits[self.cellIndex[self.corners[index]]] = 1 << index
+        self.allCorners = (1 << len(self.corners)) - 1
+
+    def getStartState(self):
+        return self.cellIndex[self.startingPosition], 0
+
+    def isGoalState(self, state):
+        cell, visited = state
+        return visited | self.cornerBits[cell] == self.allCorners
+
+    def getSuccessors(self, state):
+        cell, visited = state
+        visited |= self.cornerBits[cell]
+        successors = [(action, 1, (nextCell, visited)) for action, nextCell in self.successorTable[cell]]
+        self._expanded += 1 # DO NOT CHANGE
+        return successors
+
+    def toPublicState(self, state):
+        "Converts a compact state to the ( position, visitedCorners ) form of CornersProblem"
+        cell, visited = state
+        return self.cells[cell], tuple([bool(visited & (1 << index)) for index in self.corners])
+
+    def encodeState(self, state):
+        return state[0] << len(self.corners) | state[1]
+
+    def decodeState(self, code):
+        return code >> len(self.corners), code & self.allCorners
+
+class FoodSearchProblem(search.ExternalSearchProblem):
     """
     A search problem associated with finding the a path that collects all of the
     food (dots) in a Pacman game.
@@ -404,13 +705,22 @@ class FoodSearchProblem:
     A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
       foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+
+    The foodGrid is a BitGrid, so copying it for each successor and hashing
+    it for the closed set are cheap.
+
+    States are encoded as the number of Pacman's cell followed by a bit per
+    food dot of the start state, for search.externalAStarSearch.
     """
     def __init__(self, startingGameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        self.start = (startingGameState.getPacmanPosition(), BitGrid.fromGrid(startingGameState.getFood()))
         self.walls = startingGameState.getWalls()
+        self.successorTable = Actions.getSuccessorTable(self.walls)
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
+        self.cells, self.cellIndex = cellTable(self.walls)[:2]
+        self.foodPositions = self.start[1].asList()
 
     def getStartState(self):
         return self.start
@@ -422,14 +732,10 @@ class FoodSearchProblem:
         "Returns successor states, the actions they require, and a cost of 1."
         successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append( ( direction, 1,((nextx, nexty), nextFood)) )
+        for direction, (nextx, nexty) in self.successorTable[state[0]]:
+            nextFood = state[1].copy()
+            nextFood[nextx][nexty] = False
+            successors.append( ( direction, 1,((nextx, nexty), nextFood)) )
         return successors
 
     def getCostOfActions(self, actions):
@@ -446,6 +752,23 @@ class FoodSearchProblem:
             cost += 1
         return cost
 
+    def getStateSize(self):
+        return packedStateSize(len(self.cells), len(self.foodPositions))
+
+    def encodeState(self, state):
+        position, foodGrid = state
+        code = self.cellIndex[position]
+        for x, y in reversed(self.foodPositions):
+            code = code << 1 | foodGrid[x][y]
+        return code
+
+    def decodeState(self, code):
+        foodGrid = BitGrid(self.walls.width, self.walls.height)
+        for x, y in self.foodPositions:
+            foodGrid[x][y] = bool(code & 1)
+            code >>= 1
+        return self.cells[code], foodGrid
+
 class AStarFoodSearchAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
     def __init__(self):
@@ -486,26 +809,415 @@ def foodHeuristic(state, problem):
     "python pacman.py -l trickySearch -p AStarFoodSearchAgent"
     "python pacman.py -l testSearch -p SearchAgent -a fn=ucs,prob=FoodSearchProblem"
 
+    # The maze distance to the nearest food, plus the weight of a minimum
+    # spanning tree over the food, which any path through the food outweighs
     foodList = foodGrid.asList()
     if len(foodList) == 0: return 0
-    distances = [mazeDistance(position, food, problem.startingGameState) for food in foodList]
-    return max(distances)
-    return 0
-    
+    oracle = problemMazeDistances(problem)
+    row = oracle.getRow(oracle.cellIndex[position])
+    nearest = min([row[oracle.cellIndex[food]] for food in foodList])
+    return nearest + foodTreeWeight(problem, foodGrid, foodList)
+
+# Spanning tree weights kept per problem by foodTreeWeight
+FOOD_TREE_CACHE_SIZE = 100000
+
+def problemMazeDistances(problem):
+    "The MazeDistances for problem.walls, kept in problem.heuristicInfo"
+    if 'mazeDistances' not in problem.heuristicInfo:
+        problem.heuristicInfo['mazeDistances'] = mazeDistances.getMazeDistances(problem.walls)
+    return problem.heuristicInfo['mazeDistances']
+
+def foodTreeWeight(problem, foodKey, foodList):
+    """
+    Returns the weight of a minimum spanning tree over the positions in
+    foodList, weighted by maze distance (Prim's algorithm).
+
+    Successors that eat no food share their parent's food, so weights are
+    memoized by foodKey, which identifies the set of food, in an LRU cache
+    of FOOD_TREE_CACHE_SIZE entries in problem.heuristicInfo['foodTrees'].
+    """
+    cache = problem.heuristicInfo.get('foodTrees')
+    if cache == None:
+        cache = problem.heuristicInfo['foodTrees'] = util.LRUCache(FOOD_TREE_CACHE_SIZE)
+    weight = cache.get(foodKey)
+    if weight != None: return weight
+
+    oracle = problemMazeDistances(problem)
+    cells = [oracle.cellIndex[food] for food in foodList]
+    # closest[cell]: the distance from cell to the tree built so far
+    row = oracle.getRow(cells[0])
+    closest = dict((cell, row[cell]) for cell in cells[1:])
+    weight = 0
+    while closest:
+        cell = min(closest, key=closest.get)
+        weight += closest.pop(cell)
+        row = oracle.getRow(cell)
+        for other in closest:
+            if row[other] < closest[other]:
+                closest[other] = row[other]
+    cache[foodKey] = weight
+    return weight
+
+class CompactFoodSearchProblem(FoodSearchProblem):
+    """
+    The FoodSearchProblem with states packed into plain ints.
+
+    A state is ( cellIndex, foodMask ) where cellIndex numbers Pacman's cell
+    (see cellTable) and bit i of foodMask is set while self.foodPositions[i]
+    still has food.  Successors are generated from a precomputed table, so
+    no Grid is copied or hashed during search, and the searches expand the
+    same nodes in the same order as on FoodSearchProblem.  Use
+    compactFoodHeuristic, or toPublicState / publicStateHeuristic for
+    heuristics written for ( pacmanPosition, foodGrid ) states.
+    """
+    def __init__(self, startingGameState):
+        FoodSearchProblem.__init__(self, startingGameState)
+        self.successorTable = cellTable(self.walls)[2]
+        self.foodBits = [0] * len(self.cells)
+        for i, position in enumerate(self.foodPositions):
+            self.foodBits[self.cellIndex[position]] = 1 << i
+        self.startingPosition = self.start[0]
+        self.start = (self.cellIndex[self.startingPosition], (1 << len(self.foodPositions)) - 1)
+
+    def isGoalState(self, state):
+        return state[1] == 0
+
+    def getSuccessors(self, state):
+        "Returns successor states, the actions they require, and a cost of 1."
+        self._expanded += 1 # DO NOT CHANGE
+        food = state[1]
+        foodBits = self.foodBits
+        return [(action, 1, (nextCell, food & ~foodBits[nextCell])) for action, nextCell in self.successorTable[state[0]]]
+
+    def getCostOfActions(self, actions):
+        """Returns the cost of a particular sequence of actions.  If those actions
+        include an illegal move, return 999999"""
+        x,y= self.startingPosition
+        for action in actions:
+            dx, dy = Actions.directionToVector(action)
+            x, y = int(x + dx), int(y + dy)
+            if self.walls[x][y]:
+                return 999999
+        return len(actions)
+
+    def getFoodPositions(self, foodMask):
+        "Returns the positions whose bits are set in foodMask"
+        positions = []
+        while foodMask:
+            lowest = foodMask & -foodMask
+            positions.append(self.foodPositions[lowest.bit_length() - 1])
+            foodMask ^= lowest
+        return positions
+
+    def toPublicState(self, state):
+        "Converts a compact state to the ( pacmanPosition, foodGrid ) form of FoodSearchProblem"
+        cell, food = state
+        foodGrid = BitGrid(self.walls.width, self.walls.height)
+        for x, y in self.getFoodPositions(food):
+            foodGrid[x][y] = True
+        return self.cells[cell], foodGrid
+
+    def fromPublicState(self, state):
+        "Converts a ( pacmanPosition, foodGrid ) state to the compact form"
+        position, foodGrid = state
+        food = 0
+        for i, (x, y) in enumerate(self.foodPositions):
+            if foodGrid[x][y]: food |= 1 << i
+        return self.cellIndex[position], food
+
+    def encodeState(self, state):
+        return state[0] << len(self.foodPositions) | state[1]
+
+    def decodeState(self, code):
+        return code >> len(self.foodPositions), code & ((1 << len(self.foodPositions)) - 1)
+
+def compactFoodHeuristic(state, problem):
+    """
+    foodHeuristic for CompactFoodSearchProblem states: the maze distance to
+    the nearest food plus the spanning tree weight of the food, without
+    building a foodGrid.
+    """
+    cell, foodMask = state
+    if foodMask == 0: return 0
+    oracle = problemMazeDistances(problem)
+    foodList = problem.getFoodPositions(foodMask)
+    row = oracle.getRow(oracle.cellIndex[problem.cells[cell]])
+    nearest = min([row[oracle.cellIndex[food]] for food in foodList])
+    return nearest + foodTreeWeight(problem, foodMask, foodList)
+
+def publicStateHeuristic(heuristic):
+    """
+    Adapts a heuristic written for the public states of CornersProblem or
+    FoodSearchProblem to the compact problems, e.g.
+    search.aStarSearch(problem, publicStateHeuristic(foodHeuristic))
+    """
+    return lambda state, problem: heuristic(problem.toPublicState(state), problem)
+
+def packedStateSize(cellCount, flagCount):
+    "The bytes needed to encode a cell number below cellCount and flagCount bits"
+    bits = max(cellCount - 1, 0).bit_length() + flagCount
+    return max(1, (bits + 7) // 8)
+
+def cellTable(walls):
+    """
+    Numbers the open cells of walls.  Returns ( cells, cellIndex,
+    successorTable ) where cells[i] is the position of cell i, cellIndex maps
+    positions back to numbers, and successorTable[i] lists ( action, j ) for
+    each legal move out of cell i, in the North, South, East, West order the
+    search problems use (see game.Actions.getSuccessorTable).
+    """
+    cells = walls.asList(False)
+    cellIndex = dict((cell, i) for i, cell in enumerate(cells))
+    positionTable = Actions.getSuccessorTable(walls)
+    successorTable = [[(action, cellIndex[nextCell]) for action, nextCell in positionTable[cell]] for cell in cells]
+    return cells, cellIndex, successorTable
+
+class ExactFoodTourAgent(SearchAgent):
+    """
+    Eats all the food along an optimal tour, computed by the Held-Karp
+    dynamic program over subsets of the food (see heldKarpTour) on the maze
+    distances between Pacman and the food, instead of by searching
+    ( position, foodGrid ) states.  Each leg of the tour is then walked
+    along a shortest path.
+
+    The program takes time and memory exponential in the number of food
+    dots, so with more than maxFood dots the agent plans like
+    AStarFoodSearchAgent.  maxFood defaults to HELD_KARP_MAX_FOOD.
+
+    > python pacman.py -l trickySearch -p ExactFoodTourAgent
+    """
+    def __init__(self, maxFood=None):
+        if maxFood == None: maxFood = HELD_KARP_MAX_FOOD
+        self.maxFood = int(maxFood)
+        self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
+        self.searchType = FoodSearchProblem
+
+    def registerInitialState(self, state):
+        foodList = state.getFood().asList()
+        if len(foodList) > self.maxFood:
+            print('[ExactFoodTourAgent] %d food dots is more than %d, using A*' % (len(foodList), self.maxFood))
+            SearchAgent.registerInitialState(self, state)
+            return
+
+        starttime = time.time()
+        walls = state.getWalls()
+        distances = mazeDistances.getMazeDistances(walls)
+        start = state.getPacmanPosition()
+        startDistances = [distances.getDistance(start, food, UNREACHABLE_TOUR) for food in foodList]
+        foodDistances = [[distances.getDistance(food, other, UNREACHABLE_TOUR) for other in foodList] for food in foodList]
+        cost, order = heldKarpTour(startDistances, foodDistances)
+        if cost >= UNREACHABLE_TOUR:
+            raise Exception('Some food cannot be reached from Pacman')
+
+        successorTable = Actions.getSuccessorTable(walls)
+        self.actions = []
+        position = start
+        for i in order:
+            self.actions += shortestPath(successorTable, distances, position, foodList[i])
+            position = foodList[i]
+        self.actionIndex = 0
+        print('Path found with total cost of %d in %.1f seconds' % (len(self.actions), time.time() - starttime))
+
+# Food counts up to which ExactFoodTourAgent solves the tour exactly
+HELD_KARP_MAX_FOOD = 16 if numpy != None else 14
+
+# Stands for the distance to food that cannot be reached
+UNREACHABLE_TOUR = 1 << 20
+
+def heldKarpTour(startDistances, distances):
+    """
+    Returns ( cost, order ) for the shortest path from a start through n
+    points, given the distances startDistances[i] from the start to point i
+    and distances[i][j] between points; order lists the points in the order
+    visited.
+
+    cost[S][j], the shortest path from the start through the set S of points
+    ending at j in S, is the smallest cost[S - {j}][k] + distances[k][j].
+    Sets are bitmasks, and the table holds 2^n * n costs.  With numpy, each
+    set size and endpoint j is one vectorized step over all sets of that
+    size.
+    """
+    n = len(startDistances)
+    if n == 0: return 0, []
+    if numpy != None:
+        cost, parent = _heldKarpArrays(startDistances, distances)
+    else:
+        cost, parent = _heldKarpLists(startDistances, distances)
+
+    full = (1 << n) - 1
+    last = min(range(n), key=lambda j: cost[full][j])
+    best = int(cost[full][last])
+    order = []
+    mask, j = full, last
+    while j != -1:
+        order.append(j)
+        mask, j = mask ^ (1 << j), int(parent[mask][j])
+    order.reverse()
+    return best, order
+
+def _heldKarpArrays(startDistances, distances):
+    n = len(startDistances)
+    # Far above any tour, which costs at most n * UNREACHABLE_TOUR
+    infinity = numpy.int64(1) << 40
+    cost = numpy.full((1 << n, n), infinity, dtype=numpy.int64)
+    parent = numpy.full((1 << n, n), -1, dtype=numpy.int8)
+    steps = numpy.array(distances, dtype=numpy.int64)
+    for j in range(n):
+        cost[1 << j, j] = startDistances[j]
+
+    masks = numpy.arange(1 << n)
+    sizes = numpy.zeros(1 << n, dtype=numpy.int64)
+    for j in range(n):
+        sizes += (masks >> j) & 1
+    for size in range(2, n + 1):
+        layer = masks[sizes == size]
+        for j in range(n):
+            sets = layer[(layer >> j) & 1 == 1]
+            # cost[sets without j, k] is infinite for k not in the set, so k = j never wins
+            candidates = cost[sets ^ (1 << j)] + steps[:, j]
+            previous = candidates.argmin(axis=1)
+            cost[sets, j] = candidates[numpy.arange(len(sets)), previous]
+            parent[sets, j] = previous
+    return cost, parent
+
+def _heldKarpLists(startDistances, distances):
+    n = len(startDistances)
+    infinity = float('inf')
+    cost = [[infinity] * n for mask in range(1 << n)]
+    parent = [[-1] * n for mask in range(1 << n)]
+    for j in range(n):
+        cost[1 << j][j] = startDistances[j]
+    for mask in range(1, 1 << n):
+        members = [j for j in range(n) if mask & (1 << j)]
+        if len(members) < 2: continue
+        for j in members:
+            previousCost = cost[mask ^ (1 << j)]
+            best, bestK = infinity, -1
+            for k in members:
+                if k != j and previousCost[k] + distances[k][j] < best:
+                    best, bestK = previousCost[k] + distances[k][j], k
+            cost[mask][j], parent[mask][j] = best, bestK
+    return cost, parent
+
+def shortestPath(successorTable, distances, start, goal):
+    """
+    Returns a list of actions along a shortest path from start to goal,
+    stepping each time to a neighbor one maze distance closer to goal.
+    successorTable is from game.Actions.getSuccessorTable and distances a
+    MazeDistances for the same walls.
+    """
+    path = []
+    position = start
+    remaining = distances.getDistance(start, goal)
+    while remaining > 0:
+        for action, nextPosition in successorTable[position]:
+            if distances.getDistance(nextPosition, goal) == remaining - 1:
+                break
+        path.append(action)
+        position = nextPosition
+        remaining -= 1
+    return path
+
+class FoodDistanceField:
+    """
+    The maze distance from every open cell to its nearest food, found by one
+    breadth first search from all the food at once.  When a dot is eaten,
+    only the cells for which it was a nearest food are searched again.
+
+    Cells from which no food can be reached have no entry in distance.
+    """
+    def __init__(self, walls, foodList):
+        self.successorTable = Actions.getSuccessorTable(walls)
+        self.food = set(foodList)
+        self.distance = dict((food, 0) for food in foodList)
+        frontier, depth = list(foodList), 0
+        while frontier:
+            depth += 1
+            nextFrontier = []
+            for position in frontier:
+                for action, nextPosition in self.successorTable[position]:
+                    if nextPosition not in self.distance:
+                        self.distance[nextPosition] = depth
+                        nextFrontier.append(nextPosition)
+            frontier = nextFrontier
+
+    def pathToNearestFood(self, position):
+        """
+        Returns ( actions, food ): the actions from position to a nearest
+        food and its position, or None if no food can be reached.  Each step
+        takes the first successor, in the
+        order of the successor table, that is one step closer to food, which
+        is the path and the food that a breadth first search from position
+        with the same successor order finds first.
+        """
+        remaining = self.distance.get(position)
+        if remaining == None: return None
+        path = []
+        while remaining > 0:
+            for action, nextPosition in self.successorTable[position]:
+                if self.distance.get(nextPosition) == remaining - 1:
+                    break
+            path.append(action)
+            position = nextPosition
+            remaining -= 1
+        return path, position
+
+    def eat(self, food):
+        "Removes the food at position food and repairs the distances"
+        self.food.remove(food)
+        distance, successorTable = self.distance, self.successorTable
+
+        # The cells for which food was a nearest food: the eaten dot's
+        # distance to each of them is their distance to food
+        region = set([food])
+        frontier, depth = [food], 0
+        while frontier:
+            depth += 1
+            nextFrontier = []
+            for position in frontier:
+                for action, nextPosition in successorTable[position]:
+                    if nextPosition not in region and distance.get(nextPosition) == depth:
+                        region.add(nextPosition)
+                        nextFrontier.append(nextPosition)
+            frontier = nextFrontier
+        for position in region:
+            del distance[position]
+
+        # Search the region again, from the distances just outside it
+        buckets = {}
+        for position in region:
+            outside = [distance[nextPosition] for action, nextPosition in successorTable[position] if nextPosition in distance]
+            if outside:
+                buckets.setdefault(min(outside) + 1, []).append(position)
+        depth = min(buckets) if buckets else 0
+        while buckets:
+            for position in buckets.pop(depth, []):
+                if position in distance: continue
+                distance[position] = depth
+                for action, nextPosition in successorTable[position]:
+                    if nextPosition in region and nextPosition not in distance:
+                        buckets.setdefault(depth + 1, []).append(nextPosition)
+            depth += 1
+
 class ClosestDotSearchAgent(SearchAgent):
-    "Search for all food using a sequence of searches"
+    """
+    Search for all food using a sequence of searches
+
+    Each search would be a breadth first search for the closest dot, as in
+    findPathToClosestDot.  Instead, the agent follows a FoodDistanceField,
+    which gives the same paths without searching again from every dot.
+    """
     def registerInitialState(self, state):
         self.actions = []
-        currentState = state
-        while(currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
+        position = state.getPacmanPosition()
+        field = FoodDistanceField(state.getWalls(), state.getFood().asList())
+        while field.food:
+            nearest = field.pathToNearestFood(position)
+            if nearest == None:
+                raise Exception('Some food cannot be reached from %s' % str(position))
+            nextPathSegment, position = nearest
             self.actions += nextPathSegment
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    t = (str(action), str(currentState))
-                    raise Exception('findPathToClosestDot returned an illegal move: %s!\n%s' % t)
-                currentState = currentState.generateSuccessor(0, action)
+            field.eat(position)
         self.actionIndex = 0
         print('Path found with cost %d.' % len(self.actions))
 
@@ -545,10 +1257,17 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
         # Store info for the PositionSearchProblem (no need to change this)
         self.walls = gameState.getWalls()
+        self.successorTable = Actions.getSuccessorTable(self.walls)
         self.startState = gameState.getPacmanPosition()
-        self.costFn = lambda x: 1
+        self.costFn = unitCost
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
 
+    def getGoalState(self):
+        raise Exception('AnyFoodSearchProblem has no single goal state to search back from')
+
+    def getJumpPointProblem(self):
+        return None
+
     def isGoalState(self, state):
         """
         The state is Pacman's position. Fill this in with a goal test that will
@@ -568,11 +1287,13 @@ def mazeDistance(point1, point2, gameState):
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    The distances for a layout are all computed by the first call, and are
+    cached on disk (see mazeDistances.py); later calls are table lookups.
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return mazeDistances.getMazeDistances(walls).getDistance(point1, point2)
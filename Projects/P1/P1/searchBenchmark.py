@@ -0,0 +1,147 @@
+# searchBenchmark.py
+# ------------------
+# Times SearchAgent configurations on layouts without running a game.
+
+"""
+Runs a search agent's planning step on a layout, the same work that
+SearchAgent.registerInitialState does, and reports the plan cost, the number
+of nodes expanded and the best wall-clock time over several repeats.
+
+Agent arguments use the same syntax as pacman.py -a.  For example, to compare
+the heap and bucket priority queues of A* on bigMaze:
+
+> python searchBenchmark.py -l bigMaze -a fn=astar,heuristic=manhattanHeuristic -a fn=astar,heuristic=manhattanHeuristic,queue=bucket
+
+Without any -l or -a option the default suite in BENCHMARKS is run.
+
+With -e the eight puzzle searches in PUZZLE_SEARCHES, with Manhattan distance
+and additive pattern database ('pdb') heuristics, are compared instead on the
+loadEightPuzzle instances, reporting nodes per second and the peak memory
+allocated during each search:
+
+> python searchBenchmark.py -e
+"""
+
+import sys, time, tracemalloc
+import layout, pacman, search, searchAgents, util, eightpuzzle, patternDatabase
+
+BENCHMARKS = [
+    ('bigMaze', 'fn=ucs'),
+    ('bigMaze', 'fn=ucs,queue=bucket'),
+    ('bigMaze', 'fn=astar,heuristic=manhattanHeuristic'),
+    ('bigMaze', 'fn=astar,heuristic=manhattanHeuristic,queue=bucket'),
+    ('openMaze', 'fn=bfs'),
+    ('openMaze', 'fn=bibfs'),
+    ('openMaze', 'fn=astar,heuristic=manhattanHeuristic'),
+    ('openMaze', 'fn=biastar,heuristic=manhattanHeuristic'),
+    ('openMaze', 'fn=jps,heuristic=manhattanHeuristic'),
+    ('bigMaze', 'fn=jps,heuristic=manhattanHeuristic'),
+    ('trickySearch', 'fn=astar,prob=FoodSearchProblem,heuristic=foodHeuristic'),
+    ('trickySearch', 'fn=astar,prob=FoodSearchProblem,heuristic=foodHeuristic,queue=bucket'),
+    ('trickySearch', 'fn=hdastar,prob=FoodSearchProblem,heuristic=foodHeuristic,workers=2'),
+]
+
+# (name, problem class, search function, heuristic)
+PUZZLE_SEARCHES = [
+    ('astar', eightpuzzle.EightPuzzleSearchProblem, search.aStarSearch, eightpuzzle.eightPuzzleManhattanHeuristic),
+    ('idastar', eightpuzzle.SlidingPuzzleSearchProblem, search.idaStarSearch, eightpuzzle.slidingPuzzleManhattanHeuristic),
+    ('rbfs', eightpuzzle.SlidingPuzzleSearchProblem, search.recursiveBestFirstSearch, eightpuzzle.slidingPuzzleManhattanHeuristic),
+    ('astar-pdb', eightpuzzle.EightPuzzleSearchProblem, search.aStarSearch, 'pdb'),
+    ('idastar-pdb', eightpuzzle.SlidingPuzzleSearchProblem, search.idaStarSearch, 'pdb'),
+]
+
+def loadGameState(layoutName):
+    lay = layout.getLayout(layoutName)
+    if lay == None: raise Exception("The layout " + layoutName + " cannot be found")
+    state = pacman.GameState()
+    state.initialize(lay, 0)
+    return state
+
+def runBenchmark(layoutName, agentArgs, repeats=1):
+    """
+    Plans on layoutName with a SearchAgent built from agentArgs and returns
+    (cost, expanded, seconds), where seconds is the best of repeats runs.
+    """
+    state = loadGameState(layoutName)
+    util.mutePrint()
+    try:
+        agent = searchAgents.SearchAgent(**pacman.parseAgentArgs(agentArgs))
+        best = None
+        for i in range(repeats):
+            problem = agent.searchType(state)
+            start = time.time()
+            actions = agent.searchFunction(problem)
+            elapsed = time.time() - start
+            if best == None or elapsed < best: best = elapsed
+    finally:
+        util.unmutePrint()
+    expanded = getattr(problem, '_expanded', -1)
+    return problem.getCostOfActions(actions), expanded, best
+
+def runPuzzleBenchmark(puzzle, problemType, searchFunction, heuristic, repeats=1):
+    """
+    Solves puzzle and returns (moves, expanded, seconds, peakBytes): seconds
+    is the best of repeats runs, and peakBytes the most memory allocated at
+    once during a separate run traced by tracemalloc.
+    """
+    best = None
+    for i in range(repeats):
+        problem = problemType(puzzle)
+        start = time.time()
+        actions = searchFunction(problem, heuristic)
+        elapsed = time.time() - start
+        if best == None or elapsed < best: best = elapsed
+
+    tracemalloc.start()
+    try:
+        searchFunction(problemType(puzzle), heuristic)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return len(actions), problem._expanded, best, peak
+
+def runPuzzleBenchmarks(repeats=1):
+    # Built, or read from the cache, before anything is timed
+    pdbHeuristic = patternDatabase.AdditivePatternDatabaseHeuristic(3)
+    print('%-7s %-11s %6s %9s %9s %12s %10s' % ('puzzle', 'search', 'moves', 'expanded', 'seconds', 'nodes/sec', 'peak KB'))
+    for number in range(len(eightpuzzle.EIGHT_PUZZLE_DATA)):
+        puzzle = eightpuzzle.loadEightPuzzle(number)
+        for name, problemType, searchFunction, heuristic in PUZZLE_SEARCHES:
+            if heuristic == 'pdb': heuristic = pdbHeuristic
+            moves, expanded, seconds, peak = runPuzzleBenchmark(puzzle, problemType, searchFunction, heuristic, repeats)
+            rate = expanded / seconds if seconds > 0 else float('inf')
+            print('%-7d %-11s %6d %9d %9.4f %12.0f %10.1f' % (number, name, moves, expanded, seconds, rate, peak / 1024.0))
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser(__doc__)
+    parser.add_option('-l', '--layout', dest='layouts', action='append', default=[],
+                      help='a layout to plan on; may be repeated')
+    parser.add_option('-a', '--agentArgs', dest='agentArgs', action='append', default=[],
+                      help='SearchAgent arguments as for pacman.py -a; may be repeated')
+    parser.add_option('-r', '--repeats', dest='repeats', type='int', default=1,
+                      help='number of timed runs per benchmark; the best is reported [Default: %default]')
+    parser.add_option('-e', '--eightPuzzle', dest='eightPuzzle', action='store_true', default=False,
+                      help='compare the eight puzzle searches instead of the search agents')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    if options.eightPuzzle:
+        return None, options.repeats
+    if options.layouts or options.agentArgs:
+        layouts = options.layouts or ['bigMaze']
+        agentArgs = options.agentArgs or ['fn=astar,heuristic=manhattanHeuristic']
+        benchmarks = [(l, a) for l in layouts for a in agentArgs]
+    else:
+        benchmarks = BENCHMARKS
+    return benchmarks, options.repeats
+
+if __name__ == '__main__':
+    benchmarks, repeats = readCommand(sys.argv[1:])
+    if benchmarks == None:
+        runPuzzleBenchmarks(repeats)
+        sys.exit(0)
+    print('%-14s %-70s %6s %9s %9s' % ('layout', 'agent args', 'cost', 'expanded', 'seconds'))
+    for layoutName, agentArgs in benchmarks:
+        cost, expanded, seconds = runBenchmark(layoutName, agentArgs, repeats)
+        print('%-14s %-70s %6d %9d %9.3f' % (layoutName, agentArgs, cost, expanded, seconds))
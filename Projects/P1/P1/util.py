@@ -1,6 +1,7 @@
 import sys
 import inspect
 import heapq, random
+import collections
 
 
 class FixedRandom:
@@ -119,25 +120,41 @@ class Stack:
         "Returns true if the stack is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        self.deque = collections.deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.deque.appendleft(item)
 
     def pop(self):
         """
           Dequeue the earliest enqueued item still in the queue. This
           operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.deque.pop()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
-        return len(self.list) == 0
+        return len(self.deque) == 0
+
+    def __len__(self):
+        return len(self.deque)
+
+    def _getList(self):
+        """
+          A snapshot of the queued items, most recently enqueued first.  It
+          is a tuple, so code that used to change the queue through its list
+          fails instead of changing a copy; push and pop change the queue.
+        """
+        return tuple(self.deque)
+
+    list = property(_getList)
 
 class PriorityQueue:
     """
@@ -162,6 +179,9 @@ class PriorityQueue:
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def __len__(self):
+        return len(self.heap)
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
@@ -177,6 +197,182 @@ class PriorityQueue:
         else:
             self.push(item, priority)
 
+class IndexedPriorityQueue:
+    """
+      A drop-in alternative to PriorityQueue that also keeps a map from each
+      item to its position in the heap.  This makes update, decreaseKey and
+      remove O(log n) and membership tests O(1), instead of scanning and
+      re-heapifying the whole heap.
+
+      Items must be hashable and each item is stored at most once.  Ties
+      between equal priorities are broken in insertion order, like
+      PriorityQueue.
+    """
+    def  __init__(self):
+        self.heap = []
+        self.index = {}
+        self.count = 0
+
+    def push(self, item, priority):
+        "Adds item with the given priority, or resets its priority if present"
+        if item in self.index:
+            self._setPriority(self.index[item], priority)
+            return
+        self.heap.append([priority, self.count, item])
+        self.index[item] = len(self.heap) - 1
+        self.count += 1
+        self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        "Removes and returns the item with the lowest priority"
+        return self._removeAt(0)
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def contains(self, item):
+        return item in self.index
+
+    def getPriority(self, item):
+        return self.heap[self.index[item]][0]
+
+    def update(self, item, priority):
+        # Same contract as PriorityQueue.update: lower the priority of an item
+        # already in the queue, ignore a higher or equal one, and push a new item.
+        if item in self.index:
+            self.decreaseKey(item, priority)
+        else:
+            self.push(item, priority)
+
+    def decreaseKey(self, item, priority):
+        "Lowers the priority of an item already in the queue; KeyError if absent"
+        i = self.index[item]
+        if priority < self.heap[i][0]:
+            self.heap[i][0] = priority
+            self._siftUp(i)
+
+    def remove(self, item):
+        "Removes an item from the queue; KeyError if absent"
+        self._removeAt(self.index[item])
+
+    def _setPriority(self, i, priority):
+        old = self.heap[i][0]
+        self.heap[i][0] = priority
+        if priority < old:
+            self._siftUp(i)
+        else:
+            self._siftDown(i)
+
+    def _removeAt(self, i):
+        heap = self.heap
+        entry = heap[i]
+        del self.index[entry[2]]
+        last = heap.pop()
+        if i < len(heap):
+            heap[i] = last
+            self.index[last[2]] = i
+            self._siftUp(i)
+            self._siftDown(self.index[last[2]])
+        return entry[2]
+
+    def _less(self, a, b):
+        return a[0] < b[0] or (a[0] == b[0] and a[1] < b[1])
+
+    def _siftUp(self, i):
+        heap, index = self.heap, self.index
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not self._less(entry, heap[parent]):
+                break
+            heap[i] = heap[parent]
+            index[heap[i][2]] = i
+            i = parent
+        heap[i] = entry
+        index[entry[2]] = i
+
+    def _siftDown(self, i):
+        heap, index = self.heap, self.index
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and self._less(heap[child + 1], heap[child]):
+                child += 1
+            if not self._less(heap[child], entry):
+                break
+            heap[i] = heap[child]
+            index[heap[i][2]] = i
+            i = child
+        heap[i] = entry
+        index[entry[2]] = i
+
+class BucketPriorityQueue:
+    """
+      A bucket (Dial) priority queue for small non-negative integer
+      priorities, such as the path costs of unit-cost search problems.
+
+      Items of priority p are kept in self.buckets[p] and pop scans upward
+      from the lowest bucket that may be non-empty.  When priorities never
+      drop below the last one popped, as in uniform cost search and A* with
+      a consistent heuristic, push and pop are O(1) amortized.
+
+      Ties are broken first-in first-out by default, which pops items in
+      exactly the order PriorityQueue does.  With lifo=True the most
+      recently pushed of the tied items is popped first.
+    """
+    def  __init__(self, lifo=False):
+        self.buckets = []
+        self.lifo = lifo
+        self.minimum = 0 # no bucket below this index holds an item
+        self.size = 0
+
+    def push(self, item, priority):
+        bucket = int(priority)
+        if bucket != priority or bucket < 0:
+            raise ValueError('BucketPriorityQueue needs non-negative integer priorities, got ' + str(priority))
+        while len(self.buckets) <= bucket:
+            self.buckets.append(collections.deque())
+        self.buckets[bucket].append(item)
+        if bucket < self.minimum:
+            self.minimum = bucket
+        self.size += 1
+
+    def pop(self):
+        if self.size == 0:
+            raise IndexError('pop from an empty priority queue')
+        while not self.buckets[self.minimum]:
+            self.minimum += 1
+        self.size -= 1
+        if self.lifo:
+            return self.buckets[self.minimum].pop()
+        return self.buckets[self.minimum].popleft()
+
+    def isEmpty(self):
+        return self.size == 0
+
+    def __len__(self):
+        return self.size
+
+    def update(self, item, priority):
+        # Same contract as PriorityQueue.update, and likewise O(n).
+        for bucket in range(self.minimum, len(self.buckets)):
+            if item in self.buckets[bucket]:
+                if bucket <= priority:
+                    return
+                self.buckets[bucket].remove(item)
+                self.size -= 1
+                break
+        self.push(item, priority)
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the
@@ -193,6 +389,33 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+class LRUCache:
+    """
+      A dictionary holding at most capacity items.  Once full, storing a new
+      key evicts the key that was stored or read least recently.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        "Returns the value stored for key, or default, and marks key as recently used"
+        if key not in self.items:
+            return default
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def __setitem__(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def __len__(self):
+        return len(self.items)
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"
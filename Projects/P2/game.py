@@ -414,11 +414,13 @@ class GameStateData:
         self._lose = False
         self._win = False
         self.scoreChange = 0
+        self._hash = None
 
     def deepCopy(self):
         state = GameStateData(self)
         state.food = self.food.deepCopy()
         state.layout = self.layout.deepCopy()
+        state._hash = self._hash
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
         state._foodAdded = self._foodAdded
@@ -450,15 +452,50 @@ class GameStateData:
 
     def __hash__(self):
         """
-        Allows states to be keys of dictionaries.
+        Allows states to be keys of dictionaries.  The Zobrist hash is cached,
+        and the score, which states that are equal share too, is folded in so
+        that positions revisited with different scores do not collide.
         """
-        for i, state in enumerate(self.agentStates):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575)
+        return hash((self.getZobristHash(), self.score))
+
+    def getZobristHash(self):
+        """
+        Returns the Zobrist hash of the food, capsules and agents (see
+        layout.ZobristKeys), computed from scratch only if no predecessor
+        passed it on through updateZobristHash.
+        """
+        if self._hash == None:
+            keys = self.layout.getZobristKeys()
+            h = 0
+            for position in self.food.asList():
+                h ^= keys.foodKey(position)
+            for position in self.capsules:
+                h ^= keys.capsuleKey(position)
+            for index, agentState in enumerate(self.agentStates):
+                h ^= keys.agentKey(index, agentState)
+            self._hash = h
+        return self._hash
+
+    def updateZobristHash(self, prevState, agentIndex):
+        """
+        Derives the Zobrist hash of this state, which agentIndex's move just
+        turned prevState into, from the hash of prevState.  Only the mover
+        changes, unless Pacman ate a capsule, which scares every ghost, or a
+        scared ghost, which is sent back to its start.
+        """
+        keys = self.layout.getZobristKeys()
+        h = prevState.getZobristHash()
+        changed = [agentIndex]
+        if self._capsuleEaten != None:
+            h ^= keys.capsuleKey(self._capsuleEaten)
+            changed = range(len(self.agentStates))
+        elif agentIndex == 0:
+            changed = [index for index, eaten in enumerate(self._eaten) if eaten or index == 0]
+        if self._foodEaten != None:
+            h ^= keys.foodKey(self._foodEaten)
+        for index in changed:
+            h ^= keys.agentKey(index, prevState.agentStates[index]) ^ keys.agentKey(index, self.agentStates[index])
+        self._hash = h
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
@@ -13,13 +13,18 @@
 
 
 from util import manhattanDistance
-from game import Grid
+from game import Grid, Directions
 import os
 import random
 from functools import reduce
 
 VISIBILITY_MATRIX_CACHE = {}
 
+# Seeds the Zobrist keys, so a layout's states hash the same in every process
+ZOBRIST_SEED = 188
+# Scared timers with keys of their own, 0 up to pacman.SCARED_TIME
+ZOBRIST_SCARED_TIMES = 41
+
 
 class Layout:
     """
@@ -37,11 +42,21 @@ class Layout:
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.zobristKeys = None
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self):
         return self.numGhosts
 
+    def getZobristKeys(self):
+        """
+        Returns the ZobristKeys that hash game states on this layout, which
+        are drawn the first time they are asked for.
+        """
+        if self.zobristKeys == None:
+            self.zobristKeys = ZobristKeys(self.width, self.height, len(self.agentPositions))
+        return self.zobristKeys
+
     def initializeVisibilityMatrix(self):
         global VISIBILITY_MATRIX_CACHE
         if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
@@ -97,7 +112,9 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        layout = Layout(self.layoutText[:])
+        layout.zobristKeys = self.zobristKeys
+        return layout
 
     def processLayoutText(self, layoutText):
         """
@@ -137,6 +154,51 @@ class Layout:
             self.numGhosts += 1
 
 
+class ZobristKeys:
+    """
+    Random 64 bit keys for the food, capsules and agents of states on one
+    layout.  The Zobrist hash of a state is the XOR of the keys of the food
+    and capsules left and of each agent's (position, direction) and scared
+    timer, so a move changes it by XORing out the keys of what it changed and
+    XORing in the new ones.
+
+    Agent positions are keyed on half cells, where scared ghosts can stop.
+    Scared timers are keyed exactly, since they decide whether a ghost eats
+    Pacman or is eaten.
+    """
+    DIRECTIONS = {Directions.NORTH: 0, Directions.SOUTH: 1, Directions.EAST: 2,
+                  Directions.WEST: 3, Directions.STOP: 4}
+
+    def __init__(self, width, height, numAgents, seed=ZOBRIST_SEED):
+        rng = random.Random(seed)
+        cells = width * height
+        self.height = height
+        self.food = [rng.getrandbits(64) for i in range(cells)]
+        self.capsules = [rng.getrandbits(64) for i in range(cells)]
+        self.agents = [[rng.getrandbits(64) for i in range(cells * 4 * len(self.DIRECTIONS))]
+                       for agent in range(numAgents)]
+        self.scared = [[rng.getrandbits(64) for i in range(ZOBRIST_SCARED_TIMES)]
+                       for agent in range(numAgents)]
+
+    def foodKey(self, position):
+        x, y = position
+        return self.food[x * self.height + y]
+
+    def capsuleKey(self, position):
+        x, y = position
+        return self.capsules[x * self.height + y]
+
+    def agentKey(self, agentIndex, agentState):
+        configuration = agentState.configuration
+        if configuration == None:
+            return 0
+        x, y = configuration.pos
+        cell = int(x * 2) * self.height * 2 + int(y * 2)
+        key = cell * len(self.DIRECTIONS) + self.DIRECTIONS[configuration.direction]
+        timer = min(agentState.scaredTimer, ZOBRIST_SCARED_TIMES - 1)
+        return self.agents[agentIndex][key] ^ self.scared[agentIndex][timer]
+
+
 def getLayout(name, back=2):
     if name.endswith('.lay'):
         layout = tryToLoad('layouts/' + name)
@@ -1,8 +1,9 @@
 from util import manhattanDistance
 from game import Directions
-import random, util
+import multiprocessing, random, time, util
 
 from game import Agent
+from layout import Layout
 
 class ReflexAgent(Agent):
     """
@@ -82,6 +83,74 @@ def scoreEvaluationFunction(currentGameState):
     """
     return currentGameState.getScore()
 
+class TranspositionTable:
+    """
+    A fixed size table of the values found for positions during adversarial
+    search, so that a position reached again through a different order of
+    moves is not searched again.
+
+    Entries are keyed on the state's hash (see GameStateData.getZobristHash),
+    which covers the food, capsules, score, agent positions and exact scared
+    timers, and the agent to move, and hold the value, the number of plies that were
+    left to search and whether the value is EXACT or only a LOWER or UPPER
+    bound.  Each key has one slot; an entry stored by an earlier move's
+    search is always replaced, and one from the current search only by an
+    entry searched at least as deep.
+    """
+    EXACT, LOWER, UPPER = 'exact', 'lower', 'upper'
+
+    def __init__(self, size):
+        self.size = size
+        self.slots = [None] * size
+        self.age = 0
+        self.resetStatistics()
+
+    def resetStatistics(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def newSearch(self):
+        "Marks the entries stored so far as older than those of the next search"
+        self.age += 1
+
+    def lookup(self, state, agentIndex, depth):
+        """
+        Returns (value, bound) stored for state with agentIndex to move and
+        depth plies left, or None.
+        """
+        self.probes += 1
+        key = hash(state)
+        entry = self.slots[hash((key, agentIndex)) % self.size]
+        if entry == None or entry[0] != key or entry[1] != agentIndex or entry[2] != depth:
+            return None
+        self.hits += 1
+        return entry[3], entry[4]
+
+    def store(self, state, agentIndex, depth, value, bound):
+        key = hash(state)
+        slot = hash((key, agentIndex)) % self.size
+        entry = self.slots[slot]
+        if entry != None:
+            if entry[5] == self.age and entry[2] > depth:
+                return
+            self.replacements += 1
+        self.slots[slot] = (key, agentIndex, depth, value, bound, self.age)
+        self.stores += 1
+
+    def getStatistics(self):
+        hitRate = 100.0 * self.hits / self.probes if self.probes > 0 else 0.0
+        return 'Transposition table: %d probes, %d hits (%.1f%%), %d stores, %d replaced' % \
+            (self.probes, self.hits, hitRate, self.stores, self.replacements)
+
+# Share of the rules' move warning time an iterative deepening search may use
+ITERATIVE_TIME_FRACTION = 0.1
+
+class SearchTimeout(Exception):
+    """Raised by an iterative deepening search that runs out of time"""
+    pass
+
 class MultiAgentSearchAgent(Agent):
     """
     This class provides some common elements to all of your
@@ -97,10 +166,94 @@ class MultiAgentSearchAgent(Agent):
     is another abstract class.
     """
 
-    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2'):
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tt = '0', workers = '0'):
         self.index = 0 # Pacman is always agent index 0
         self.evaluationFunction = util.lookup(evalFn, globals())
         self.depth = int(depth)
+        # A transposition table of tt entries, if tt is positive
+        self.transpositionTable = None
+        if int(tt) > 0:
+            self.transpositionTable = TranspositionTable(int(tt))
+        # With more than one worker the search runs in a pool of processes
+        self.evalFn = evalFn
+        self.tt = int(tt)
+        self.workers = int(workers)
+        self.pool = None
+        self.searchNumber = 0
+
+    def startSearch(self):
+        if self.transpositionTable != None:
+            self.transpositionTable.newSearch()
+
+    def lookupValue(self, gameState, depth, agentIndex, alpha = float('-inf'), beta = float('inf')):
+        """
+        Returns the value in the transposition table for gameState with
+        agentIndex to move and depth plies left, if there is one and it is
+        exact, or a bound that already settles the node in (alpha, beta).
+        Only values searched to exactly depth are used, so the table never
+        changes the agent's decisions.
+        """
+        if self.transpositionTable == None:
+            return None
+        entry = self.transpositionTable.lookup(gameState, agentIndex, depth)
+        if entry == None:
+            return None
+        value, bound = entry
+        if bound == TranspositionTable.EXACT or \
+                (bound == TranspositionTable.LOWER and value > beta) or \
+                (bound == TranspositionTable.UPPER and value < alpha):
+            return value
+        return None
+
+    def storeValue(self, gameState, depth, agentIndex, value, alpha = float('-inf'), beta = float('inf')):
+        """
+        Stores the value found for gameState by a search in the window
+        (alpha, beta), which prunes only on values strictly outside it: a
+        value below alpha is an upper bound, one above beta a lower bound.
+        """
+        if self.transpositionTable == None:
+            return
+        if value < alpha:
+            bound = TranspositionTable.UPPER
+        elif value > beta:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+        self.transpositionTable.store(gameState, agentIndex, depth, value, bound)
+
+    def getWorkerPool(self, agentType, gameState):
+        """
+        Returns the pool of self.workers processes that search with an
+        agentType agent.  It is started on the first move of a game and again
+        only if the layout changes, so the layout is sent to each worker
+        once, and shut down by final.  The workers share self.sharedAlpha,
+        a RawValue.
+        """
+        layoutText = gameState.data.layout.layoutText
+        if self.pool == None or self.poolLayoutText != layoutText:
+            if self.pool != None:
+                self.pool.terminate()
+            if 'fork' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('fork')
+            else:
+                context = multiprocessing.get_context()
+            self.sharedAlpha = context.RawValue('d', float('-inf'))
+            self.pool = context.Pool(self.workers, _initSearchWorker,
+                                     (agentType, self.evalFn, self.depth, self.tt, type(gameState), layoutText, self.sharedAlpha))
+            self.poolLayoutText = layoutText
+        self.searchNumber += 1
+        return self.pool
+
+    def final(self, state):
+        # Parallel searches probe the tables of the workers, which are not counted here
+        if self.transpositionTable != None and self.transpositionTable.probes > 0:
+            print(self.transpositionTable.getStatistics())
+            self.transpositionTable.resetStatistics()
+        # The workers are not kept between games
+        if self.pool != None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
 
 class MinimaxAgent(MultiAgentSearchAgent):
     """
@@ -130,19 +283,28 @@ class MinimaxAgent(MultiAgentSearchAgent):
         gameState.isLose():
         Returns whether or not the game state is a losing state
         """
+        if self.workers > 1:
+            return self.getParallelAction(gameState)
         "*** YOUR CODE HERE ***"
         def maxValue(gameState, depth, agentIndex):
             if gameState.isWin() or gameState.isLose() or depth == 0:
                 return self.evaluationFunction(gameState)
+            value = self.lookupValue(gameState, depth, agentIndex)
+            if value != None:
+                return value
             value = float('-inf')
             legalActions = gameState.getLegalActions(agentIndex)
             for action in legalActions:
                 value = max(value, minValue(gameState.generateSuccessor(agentIndex, action), depth, agentIndex + 1))
+            self.storeValue(gameState, depth, agentIndex, value)
             return value
 
         def minValue(gameState, depth, agentIndex):
             if gameState.isWin() or gameState.isLose() or depth == 0:
                 return self.evaluationFunction(gameState)
+            value = self.lookupValue(gameState, depth, agentIndex)
+            if value != None:
+                return value
             value = float("inf")
             legalActions = gameState.getLegalActions(agentIndex)
             for action in legalActions:
@@ -150,37 +312,73 @@ class MinimaxAgent(MultiAgentSearchAgent):
                     value = min(value, maxValue(gameState.generateSuccessor(agentIndex, action), depth - 1, 0))
                 else:
                     value = min(value, minValue(gameState.generateSuccessor(agentIndex, action), depth, agentIndex + 1))
+            self.storeValue(gameState, depth, agentIndex, value)
             return value
 
+        self.startSearch()
         legalActions = gameState.getLegalActions(0)
         values = [minValue(gameState.generateSuccessor(0, action), self.depth, 1) for action in legalActions]
         return legalActions[values.index(max(values))]
 
+    def getParallelAction(self, gameState):
+        "Searches each root action in a worker process"
+        pool = self.getWorkerPool(InPlaceMinimaxAgent, gameState)
+        packed = _packState(gameState)
+        legalActions = gameState.getLegalActions(0)
+        tasks = [(packed, [(0, action)], (self.depth, 1), self.searchNumber) for action in legalActions]
+        values = pool.map(_searchSubtree, tasks, 1)
+        return legalActions[values.index(max(values))]
+
 class AlphaBetaAgent(MultiAgentSearchAgent):
     """
     Your minimax agent with alpha-beta pruning (question 3)
+
+    With -a iterative the agent ignores depth and deepens its search one ply
+    at a time until moveTime seconds have passed, by default a share of the
+    move warning time of ClassicGameRules.
     """
 
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tt = '0', workers = '0', iterative = '0', moveTime = None):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, tt, workers)
+        self.iterative = int(iterative) > 0
+        if moveTime == None:
+            from pacman import ClassicGameRules
+            moveTime = ITERATIVE_TIME_FRACTION * ClassicGameRules().getMoveWarningTime(self.index)
+        self.moveTime = float(moveTime)
+
     def getAction(self, gameState):
         """
         Returns the minimax action using self.depth and self.evaluationFunction
         """
+        if self.iterative:
+            return self.getIterativeAction(gameState)
+        if self.workers > 1:
+            return self.getParallelAction(gameState)
         "*** YOUR CODE HERE ***"
         def maxValue(gameState, depth, agentIndex, alpha, beta):
             if gameState.isWin() or gameState.isLose() or depth == 0:
                 return self.evaluationFunction(gameState)
+            value = self.lookupValue(gameState, depth, agentIndex, alpha, beta)
+            if value != None:
+                return value
+            window = alpha, beta
             value = float('-inf')
             legalActions = gameState.getLegalActions(agentIndex)
             for action in legalActions:
                 value = max(value, minValue(gameState.generateSuccessor(agentIndex, action), depth, agentIndex + 1, alpha, beta))
                 if value > beta:
-                    return value
+                    break
                 alpha = max(alpha, value)
+            self.storeValue(gameState, depth, agentIndex, value, *window)
             return value
 
         def minValue(gameState, depth, agentIndex, alpha, beta):
             if gameState.isWin() or gameState.isLose() or depth == 0:
                 return self.evaluationFunction(gameState)
+            value = self.lookupValue(gameState, depth, agentIndex, alpha, beta)
+            if value != None:
+                return value
+            window = alpha, beta
             value = float("inf")
             legalActions = gameState.getLegalActions(agentIndex)
             for action in legalActions:
@@ -189,10 +387,12 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
                 else:
                     value = min(value, minValue(gameState.generateSuccessor(agentIndex, action), depth, agentIndex + 1, alpha, beta))
                 if value < alpha:
-                    return value
+                    break
                 beta = min(beta, value)
+            self.storeValue(gameState, depth, agentIndex, value, *window)
             return value
 
+        self.startSearch()
         alpha = float('-inf')
         beta = float('inf')
         legalActions = gameState.getLegalActions(0)
@@ -206,6 +406,137 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
             alpha = max(alpha, currValue)
         return bestAction
 
+    def getParallelAction(self, gameState):
+        """
+        Searches the first root action, then the others in worker processes
+        with its value as alpha (young brothers wait).  As results come in,
+        the best value so far is shared with the workers still searching.
+        Any action whose value is Pacman's best is searched with an alpha no
+        higher than that value, so it comes back exact and the first one is
+        chosen, as in the serial search; the rest come back lower.
+        """
+        pool = self.getWorkerPool(InPlaceAlphaBetaAgent, gameState)
+        packed = _packState(gameState)
+        legalActions = gameState.getLegalActions(0)
+        sharedAlpha = self.sharedAlpha
+        sharedAlpha.value = float('-inf')
+        task = (packed, [(0, legalActions[0])], (self.depth, 1, float('-inf'), float('inf')), self.searchNumber)
+        values = [pool.apply(_searchSubtree, (task,))]
+        sharedAlpha.value = values[0]
+
+        def raiseAlpha(value):
+            if value > sharedAlpha.value:
+                sharedAlpha.value = value
+        results = []
+        for action in legalActions[1:]:
+            task = (packed, [(0, action)], (self.depth, 1, values[0], float('inf')), self.searchNumber)
+            results.append(pool.apply_async(_searchSubtree, (task,), callback=raiseAlpha))
+        values += [result.get() for result in results]
+        return legalActions[values.index(max(values))]
+
+    def getIterativeAction(self, gameState):
+        """
+        Runs alpha-beta searches of depth 1, 2, 3, ... until self.moveTime
+        runs out, or a search reaches the end of every line of play, and
+        returns the best action of the deepest search that finished.  The
+        first search always finishes.
+        """
+        self.startSearch()
+        self.deadline = time.time() + self.moveTime
+        self.killers = {}
+        self.history = util.Counter()
+        self.principalVariation = []
+        depth = 1
+        while True:
+            self.timed = depth > 1
+            self.depthCutoff = False
+            self.variations = {}
+            try:
+                self.iterativeValue(gameState, depth, 0, 0, float('-inf'), float('inf'), True)
+            except SearchTimeout:
+                break
+            self.principalVariation = self.variations[0]
+            if not self.depthCutoff:
+                break
+            depth += 1
+        return self.principalVariation[0]
+
+    def iterativeValue(self, gameState, depth, agentIndex, ply, alpha, beta, onVariation):
+        """
+        The alpha-beta value of gameState, with agentIndex to move, ply moves
+        below the root and depth plies left.  The best line found from here
+        is left in self.variations[ply].  onVariation tells whether the moves
+        to gameState follow the previous search's principal variation.
+        """
+        if self.timed and time.time() > self.deadline:
+            raise SearchTimeout()
+        self.variations[ply] = []
+        if gameState.isWin() or gameState.isLose():
+            return self.evaluationFunction(gameState)
+        if depth == 0:
+            self.depthCutoff = True
+            return self.evaluationFunction(gameState)
+        if ply > 0:
+            value = self.lookupValue(gameState, depth, agentIndex, alpha, beta)
+            if value != None:
+                # The stored search may have been cut off below here
+                self.depthCutoff = True
+                return value
+
+        window = alpha, beta
+        nextAgent = (agentIndex + 1) % gameState.getNumAgents()
+        nextDepth = depth - 1 if nextAgent == 0 else depth
+        maximizing = agentIndex == 0
+        value = float('-inf') if maximizing else float('inf')
+        for action in self.orderActions(gameState.getLegalActions(agentIndex), agentIndex, ply, onVariation):
+            childOnVariation = onVariation and ply < len(self.principalVariation) and self.principalVariation[ply] == action
+            childValue = self.iterativeValue(gameState.generateSuccessor(agentIndex, action), nextDepth, nextAgent,
+                                             ply + 1, alpha, beta, childOnVariation)
+            # The first child is recorded even at -inf, so a lost root still has a move
+            if (maximizing and childValue > value) or (not maximizing and childValue < value) \
+                    or not self.variations[ply]:
+                value = childValue
+                self.variations[ply] = [action] + self.variations[ply + 1]
+            if maximizing:
+                if value > beta:
+                    self.recordCutoff(agentIndex, action, ply, depth)
+                    break
+                alpha = max(alpha, value)
+            else:
+                if value < alpha:
+                    self.recordCutoff(agentIndex, action, ply, depth)
+                    break
+                beta = min(beta, value)
+        self.storeValue(gameState, depth, agentIndex, value, *window)
+        return value
+
+    def orderActions(self, actions, agentIndex, ply, onVariation):
+        """
+        Orders actions to search: the previous search's principal variation
+        move, if gameState lies on it, then the killer moves that caused
+        cutoffs at this ply, then the rest by their history scores.
+        """
+        variationMove = None
+        if onVariation and ply < len(self.principalVariation):
+            variationMove = self.principalVariation[ply]
+        killers = self.killers.get(ply, [])
+
+        def rank(action):
+            if action == variationMove:
+                return 0, 0
+            if action in killers:
+                return 1, killers.index(action)
+            return 2, -self.history[(agentIndex, action)]
+        return sorted(actions, key=rank)
+
+    def recordCutoff(self, agentIndex, action, ply, depth):
+        "Remembers action as a killer move at ply and adds to its history score"
+        killers = self.killers.setdefault(ply, [])
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[2:]
+        self.history[(agentIndex, action)] += depth * depth
+
 class ExpectimaxAgent(MultiAgentSearchAgent):
     """
       Your expectimax agent (question 4)
@@ -218,10 +549,15 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         All ghosts should be modeled as choosing uniformly at random from their
         legal moves.
         """
+        if self.workers > 1:
+            return self.getParallelAction(gameState)
         "*** YOUR CODE HERE ***"
         def expectedValue(gameState, depth, agentIndex):
             if gameState.isWin() or gameState.isLose() or depth == 0:
                 return self.evaluationFunction(gameState)
+            value = self.lookupValue(gameState, depth, agentIndex)
+            if value != None:
+                return value
             value = float('-inf')
             expValue = 0
             legalActions = gameState.getLegalActions(agentIndex)
@@ -235,12 +571,233 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
                     else:
                         expValue += expectedValue(gameState.generateSuccessor(agentIndex, action), depth, agentIndex + 1)
                 value = expValue/len(legalActions)
+            self.storeValue(gameState, depth, agentIndex, value)
             return value
 
+        self.startSearch()
         legalActions = gameState.getLegalActions(0)
         values = [expectedValue(gameState.generateSuccessor(0, action), self.depth, 1) for action in legalActions]
         return legalActions[values.index(max(values))]
 
+    def getParallelAction(self, gameState):
+        """
+        Splits the chance node after each root action into one task per
+        reply of the first ghost, searched in worker processes, and averages
+        the replies' values in the order the serial search adds them up.
+        """
+        pool = self.getWorkerPool(InPlaceExpectimaxAgent, gameState)
+        packed = _packState(gameState)
+        legalActions = gameState.getLegalActions(0)
+        nextAgent = 2 % gameState.getNumAgents()
+        nextDepth = self.depth - 1 if nextAgent == 0 else self.depth
+        tasks = []
+        chanceNodes = []
+        for action in legalActions:
+            successor = gameState.generateSuccessor(0, action)
+            if successor.isWin() or successor.isLose() or self.depth == 0:
+                chanceNodes.append(self.evaluationFunction(successor))
+                continue
+            ghostActions = successor.getLegalActions(1)
+            chanceNodes.append((len(tasks), len(ghostActions)))
+            for ghostAction in ghostActions:
+                tasks.append((packed, [(0, action), (1, ghostAction)], (nextDepth, nextAgent), self.searchNumber))
+        replyValues = pool.map(_searchSubtree, tasks, 1)
+
+        values = []
+        for node in chanceNodes:
+            if type(node) != tuple:
+                values.append(node)
+                continue
+            start, count = node
+            expValue = 0
+            for value in replyValues[start:start + count]:
+                expValue += value
+            values.append(expValue/count)
+        return legalActions[values.index(max(values))]
+
+
+class InPlaceMinimaxAgent(MinimaxAgent):
+    """
+    A MinimaxAgent that searches by applying and undoing moves on a single
+    copy of the game state (see GameState.applyMove) rather than generating
+    a new state at every node.  It makes the same decisions.
+    """
+
+    def getAction(self, gameState):
+        if self.workers > 1:
+            return self.getParallelAction(gameState)
+        state = gameState.deepCopy()
+        self.startSearch()
+        legalActions = state.getLegalActions(0)
+        values = []
+        for action in legalActions:
+            token = state.applyMove(0, action)
+            values.append(self.inPlaceValue(state, self.depth, 1))
+            state.undoMove(token)
+        return legalActions[values.index(max(values))]
+
+    def inPlaceValue(self, state, depth, agentIndex):
+        "The minimax value of state, with agentIndex to move and depth plies left"
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        stored = self.lookupValue(state, depth, agentIndex)
+        if stored != None:
+            return stored
+        nextAgent = (agentIndex + 1) % state.getNumAgents()
+        nextDepth = depth - 1 if nextAgent == 0 else depth
+        values = []
+        for action in state.getLegalActions(agentIndex):
+            token = state.applyMove(agentIndex, action)
+            values.append(self.inPlaceValue(state, nextDepth, nextAgent))
+            state.undoMove(token)
+        value = max(values) if agentIndex == 0 else min(values)
+        self.storeValue(state, depth, agentIndex, value)
+        return value
+
+class InPlaceAlphaBetaAgent(AlphaBetaAgent):
+    """
+    An AlphaBetaAgent that searches by applying and undoing moves on a single
+    copy of the game state, making the same decisions.  The iterative
+    deepening mode still generates successors.
+    """
+    # Pacman's best value so far at the root, shared by parallel workers
+    sharedAlpha = None
+
+    def getAction(self, gameState):
+        if self.iterative:
+            return self.getIterativeAction(gameState)
+        if self.workers > 1:
+            return self.getParallelAction(gameState)
+        state = gameState.deepCopy()
+        self.startSearch()
+        alpha = float('-inf')
+        beta = float('inf')
+        legalActions = state.getLegalActions(0)
+        currValue = float('-inf')
+        bestAction = legalActions[0]
+        for action in legalActions:
+            token = state.applyMove(0, action)
+            newValue = self.inPlaceValue(state, self.depth, 1, alpha, beta)
+            state.undoMove(token)
+            if newValue > currValue:
+                bestAction = action
+                currValue = newValue
+            alpha = max(alpha, currValue)
+        return bestAction
+
+    def inPlaceValue(self, state, depth, agentIndex, alpha, beta):
+        """
+        The alpha-beta value of state, with agentIndex to move and depth plies
+        left.  Under a parallel search alpha is raised to self.sharedAlpha
+        whenever another worker finds a better root action, which is Pacman's
+        guaranteed value everywhere below the root.
+        """
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        if self.sharedAlpha != None:
+            alpha = max(alpha, self.sharedAlpha.value)
+        stored = self.lookupValue(state, depth, agentIndex, alpha, beta)
+        if stored != None:
+            return stored
+        nextAgent = (agentIndex + 1) % state.getNumAgents()
+        nextDepth = depth - 1 if nextAgent == 0 else depth
+        value = float('-inf') if agentIndex == 0 else float('inf')
+        for action in state.getLegalActions(agentIndex):
+            token = state.applyMove(agentIndex, action)
+            childValue = self.inPlaceValue(state, nextDepth, nextAgent, alpha, beta)
+            state.undoMove(token)
+            if agentIndex == 0:
+                value = max(value, childValue)
+                if value > beta:
+                    break
+                alpha = max(alpha, value)
+            else:
+                value = min(value, childValue)
+                if value < alpha:
+                    break
+                beta = min(beta, value)
+        if self.sharedAlpha != None:
+            # Children may have pruned against a higher alpha than the node began with
+            alpha = max(alpha, self.sharedAlpha.value)
+        self.storeValue(state, depth, agentIndex, value, alpha, beta)
+        return value
+
+class InPlaceExpectimaxAgent(ExpectimaxAgent):
+    """
+    An ExpectimaxAgent that searches by applying and undoing moves on a
+    single copy of the game state, making the same decisions.
+    """
+
+    def getAction(self, gameState):
+        if self.workers > 1:
+            return self.getParallelAction(gameState)
+        state = gameState.deepCopy()
+        self.startSearch()
+        legalActions = state.getLegalActions(0)
+        values = []
+        for action in legalActions:
+            token = state.applyMove(0, action)
+            values.append(self.inPlaceValue(state, self.depth, 1))
+            state.undoMove(token)
+        return legalActions[values.index(max(values))]
+
+    def inPlaceValue(self, state, depth, agentIndex):
+        "The expectimax value of state, with agentIndex to move and depth plies left"
+        if state.isWin() or state.isLose() or depth == 0:
+            return self.evaluationFunction(state)
+        stored = self.lookupValue(state, depth, agentIndex)
+        if stored != None:
+            return stored
+        nextAgent = (agentIndex + 1) % state.getNumAgents()
+        nextDepth = depth - 1 if nextAgent == 0 else depth
+        legalActions = state.getLegalActions(agentIndex)
+        value = float('-inf')
+        expValue = 0
+        for action in legalActions:
+            token = state.applyMove(agentIndex, action)
+            childValue = self.inPlaceValue(state, nextDepth, nextAgent)
+            state.undoMove(token)
+            if agentIndex == 0:
+                value = max(value, childValue)
+            else:
+                expValue += childValue
+        if agentIndex != 0:
+            value = expValue/len(legalActions)
+        self.storeValue(state, depth, agentIndex, value)
+        return value
+
+def _packState(gameState):
+    "The parts of gameState that change during a game, for sending to workers"
+    data = gameState.data
+    return data.food, data.capsules, data.agentStates, data.score, data._eaten, data._win, data._lose
+
+def _initSearchWorker(agentType, evalFn, depth, tt, stateType, layoutText, sharedAlpha):
+    "Sets up a pool process with the agent that searches and the layout"
+    global _searchAgent, _searchStateType, _searchLayout, _searchNumber
+    _searchAgent = agentType(evalFn, depth, tt)
+    _searchAgent.sharedAlpha = sharedAlpha
+    _searchStateType = stateType
+    _searchLayout = Layout(layoutText)
+    _searchNumber = None
+
+def _searchSubtree(task):
+    """
+    Applies moves, a list of (agentIndex, action), to the packed state and
+    returns the in-place search value of the result for args.  searchNumber
+    tells the worker's transposition table when a new move's search begins.
+    """
+    global _searchNumber
+    packed, moves, args, searchNumber = task
+    if searchNumber != _searchNumber:
+        _searchAgent.startSearch()
+        _searchNumber = searchNumber
+    state = _searchStateType()
+    data = state.data
+    data.food, data.capsules, data.agentStates, data.score, data._eaten, data._win, data._lose = packed
+    data.layout = _searchLayout
+    for agentIndex, action in moves:
+        state.applyMove(agentIndex, action)
+    return _searchAgent.inPlaceValue(state, *args)
 
 def betterEvaluationFunction(currentGameState):
     """
@@ -129,10 +129,88 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
+        state.data.updateZobristHash(self.data, agentIndex)
         GameState.explored.add(self)
         GameState.explored.add(state)
         return state
 
+    def applyMove(self, agentIndex, action):
+        """
+        Applies the specified agent's action to this state in place, with the
+        same effects as generateSuccessor, and returns a token for undoMove
+        to take the move back.
+
+        Eaten food is removed from this state's own food grid, which states
+        from generateSuccessor share, so apply moves to a deepCopy.
+        """
+        if self.isWin() or self.isLose():
+            raise Exception('Can\'t generate a successor of a terminal state.')
+
+        data = self.data
+        keys = data.layout.getZobristKeys()
+        h = data.getZobristHash()
+        # Pacman's move can scare or eat any ghost, a ghost's only changes itself
+        changed = range(len(data.agentStates)) if agentIndex == 0 else [agentIndex]
+        agents = []
+        for index in changed:
+            agentState = data.agentStates[index]
+            agents.append((agentState, agentState.configuration, agentState.scaredTimer))
+            h ^= keys.agentKey(index, agentState)
+        before = (agents, data.capsules, data._eaten, data._eaten[agentIndex], data.score, data._win, data._lose,
+                  data._foodEaten, data._foodAdded, data._capsuleEaten, data._agentMoved, data.scoreChange, data._hash)
+        data._foodEaten = None
+        data._foodAdded = None
+        data._capsuleEaten = None
+        data.scoreChange = 0
+
+        if agentIndex == 0:  # Pacman is moving
+            data._eaten = [False for i in range(len(data.agentStates))]
+            PacmanRules.applyAction(self, action, True)
+            data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
+        else:                # A ghost is moving
+            GhostRules.applyAction(self, action, agentIndex)
+            GhostRules.decrementTimer(data.agentStates[agentIndex])
+        GhostRules.checkDeath(self, agentIndex)
+
+        data._agentMoved = agentIndex
+        data.score += data.scoreChange
+        for index in changed:
+            h ^= keys.agentKey(index, data.agentStates[index])
+        if data._foodEaten != None:
+            h ^= keys.foodKey(data._foodEaten)
+        if data._capsuleEaten != None:
+            h ^= keys.capsuleKey(data._capsuleEaten)
+        data._hash = h
+        return agentIndex, data._foodEaten, before
+
+    def undoMove(self, token):
+        """
+        Restores this state to what it was before the applyMove that returned
+        token.  Moves must be undone in the reverse of the order applied.
+        """
+        data = self.data
+        agentIndex, foodEaten, before = token
+        (agents, capsules, eaten, wasEaten, score, win, lose,
+         lastFoodEaten, foodAdded, capsuleEaten, agentMoved, scoreChange, h) = before
+        for agentState, configuration, scaredTimer in agents:
+            agentState.configuration = configuration
+            agentState.scaredTimer = scaredTimer
+        if foodEaten != None:
+            x, y = foodEaten
+            data.food[x][y] = True
+        data.capsules = capsules
+        data._eaten = eaten
+        eaten[agentIndex] = wasEaten
+        data.score = score
+        data._win = win
+        data._lose = lose
+        data._foodEaten = lastFoodEaten
+        data._foodAdded = foodAdded
+        data._capsuleEaten = capsuleEaten
+        data._agentMoved = agentMoved
+        data.scoreChange = scoreChange
+        data._hash = h
+
     def getLegalPacmanActions(self):
         return self.getLegalActions(0)
 
@@ -353,9 +431,10 @@ class PacmanRules:
         return Actions.getPossibleActions(state.getPacmanState().configuration, state.data.layout.walls)
     getLegalActions = staticmethod(getLegalActions)
 
-    def applyAction(state, action):
+    def applyAction(state, action, inPlace=False):
         """
-        Edits the state to reflect the results of the action.
+        Edits the state to reflect the results of the action.  Unless inPlace,
+        the food grid and capsule list are copied before anything is eaten.
         """
         legal = PacmanRules.getLegalActions(state)
         if action not in legal:
@@ -373,15 +452,16 @@ class PacmanRules:
         nearest = nearestPoint(next)
         if manhattanDistance(nearest, next) <= 0.5:
             # Remove food
-            PacmanRules.consume(nearest, state)
+            PacmanRules.consume(nearest, state, inPlace)
     applyAction = staticmethod(applyAction)
 
-    def consume(position, state):
+    def consume(position, state, inPlace=False):
         x, y = position
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
+            if not inPlace:
+                state.data.food = state.data.food.copy()
             state.data.food[x][y] = False
             state.data._foodEaten = position
             # TODO: cache numFood?
@@ -391,7 +471,8 @@ class PacmanRules:
                 state.data._win = True
         # Eat capsule
         if(position in state.getCapsules()):
-            state.data.capsules.remove(position)
+            # A new list rather than remove(), so undoMove can restore the old one
+            state.data.capsules = [capsule for capsule in state.data.capsules if capsule != position]
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
@@ -30,6 +30,7 @@
 import sys
 import inspect
 import heapq
+import collections
 import random
 import io
 import functools
@@ -184,22 +185,32 @@ class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
 
     def __init__(self):
-        self.list = []
+        self.deque = collections.deque()
 
     def push(self, item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0, item)
+        self.deque.appendleft(item)
 
     def pop(self):
         """
         Dequeue the earliest enqueued item still in the queue. This
         operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.deque.pop()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
-        return len(self.list) == 0
+        return len(self.deque) == 0
+
+    def _getList(self):
+        """
+          A snapshot of the queued items, most recently enqueued first.  It
+          is a tuple, so code that used to change the queue through its list
+          fails instead of changing a copy; push and pop change the queue.
+        """
+        return tuple(self.deque)
+
+    list = property(_getList)
 
 
 class PriorityQueue:
@@ -242,6 +253,124 @@ class PriorityQueue:
             self.push(item, priority)
 
 
+class IndexedPriorityQueue:
+    """
+      A drop-in alternative to PriorityQueue that also keeps a map from each
+      item to its position in the heap.  This makes update, decreaseKey and
+      remove O(log n) and membership tests O(1), instead of scanning and
+      re-heapifying the whole heap.
+
+      Items must be hashable and each item is stored at most once.  Ties
+      between equal priorities are broken in insertion order, like
+      PriorityQueue.
+    """
+    def  __init__(self):
+        self.heap = []
+        self.index = {}
+        self.count = 0
+
+    def push(self, item, priority):
+        "Adds item with the given priority, or resets its priority if present"
+        if item in self.index:
+            self._setPriority(self.index[item], priority)
+            return
+        self.heap.append([priority, self.count, item])
+        self.index[item] = len(self.heap) - 1
+        self.count += 1
+        self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        "Removes and returns the item with the lowest priority"
+        return self._removeAt(0)
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def contains(self, item):
+        return item in self.index
+
+    def getPriority(self, item):
+        return self.heap[self.index[item]][0]
+
+    def update(self, item, priority):
+        # Same contract as PriorityQueue.update: lower the priority of an item
+        # already in the queue, ignore a higher or equal one, and push a new item.
+        if item in self.index:
+            self.decreaseKey(item, priority)
+        else:
+            self.push(item, priority)
+
+    def decreaseKey(self, item, priority):
+        "Lowers the priority of an item already in the queue; KeyError if absent"
+        i = self.index[item]
+        if priority < self.heap[i][0]:
+            self.heap[i][0] = priority
+            self._siftUp(i)
+
+    def remove(self, item):
+        "Removes an item from the queue; KeyError if absent"
+        self._removeAt(self.index[item])
+
+    def _setPriority(self, i, priority):
+        old = self.heap[i][0]
+        self.heap[i][0] = priority
+        if priority < old:
+            self._siftUp(i)
+        else:
+            self._siftDown(i)
+
+    def _removeAt(self, i):
+        heap = self.heap
+        entry = heap[i]
+        del self.index[entry[2]]
+        last = heap.pop()
+        if i < len(heap):
+            heap[i] = last
+            self.index[last[2]] = i
+            self._siftUp(i)
+            self._siftDown(self.index[last[2]])
+        return entry[2]
+
+    def _less(self, a, b):
+        return a[0] < b[0] or (a[0] == b[0] and a[1] < b[1])
+
+    def _siftUp(self, i):
+        heap, index = self.heap, self.index
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not self._less(entry, heap[parent]):
+                break
+            heap[i] = heap[parent]
+            index[heap[i][2]] = i
+            i = parent
+        heap[i] = entry
+        index[entry[2]] = i
+
+    def _siftDown(self, i):
+        heap, index = self.heap, self.index
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and self._less(heap[child + 1], heap[child]):
+                child += 1
+            if not self._less(heap[child], entry):
+                break
+            heap[i] = heap[child]
+            index[heap[i][2]] = i
+            i = child
+        heap[i] = entry
+        index[entry[2]] = i
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the
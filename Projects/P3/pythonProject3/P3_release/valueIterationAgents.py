@@ -147,7 +147,7 @@ class PrioritizedSweepingValueIterationAgent(AsynchronousValueIterationAgent):
     def runValueIteration(self):
         "*** YOUR CODE HERE ***"
         states = self.mdp.getStates()
-        q = util.PriorityQueue()
+        q = util.IndexedPriorityQueue()
         predecessors = {}
         for state in states:
             predecessors[state] = set()
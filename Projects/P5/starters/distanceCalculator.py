@@ -23,7 +23,7 @@ distancer = Distancer(gameState.data.layout)
 distancer.getDistance( (1,1), (10,10) )
 
 The Distancer object also serves as an example of sharing data
-safely among agents via a global dictionary (distanceMap),
+safely among agents via a module-level cache (see mazeDistances.py),
 and performing asynchronous computation via threads. These
 examples may help you in designing your own objects, but you
 shouldn't need to modify the Distancer code in order to use its
@@ -31,6 +31,7 @@ distances.
 """
 
 import threading, sys, time, random
+import mazeDistances
 
 class Distancer:
   def __init__(self, layout, background=True, default=10000):
@@ -75,11 +76,10 @@ class Distancer:
     return bestDistance
 
   def getDistanceOnGrid(self, pos1, pos2):
-    key = (pos1, pos2)
-    if key in self._distances:
-      return self._distances[key]
-    else:
-      raise Exception("Positions not in grid: " + str(key))
+    try:
+      return self._distances.getDistance(pos1, pos2, 1000000000)
+    except KeyError:
+      raise Exception("Positions not in grid: " + str((pos1, pos2)))
 
   def isReadyForMazeDistance(self):
     return self._distances != None
@@ -108,8 +108,7 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
-distanceMap = {}
-distanceMapSemaphore = threading.Semaphore(1)
+distanceSemaphore = threading.Semaphore(1)
 distanceThread = None
 
 def waitOnDistanceCalculator(t):
@@ -124,66 +123,22 @@ class DistanceCalculator(threading.Thread):
     self.default = default
 
   def run(self):
-    global distanceMap, distanceThread
-    distanceMapSemaphore.acquire()
-
-    if self.layout.walls not in distanceMap:
-      if distanceThread != None: raise Exception('Multiple distance threads')
-      distanceThread = self
-
-      distances = computeDistances(self.layout)
-      #TODO:for oj
-      # print('[Distancer]: Switching to maze distances',file=sys.stdout)
-
-      distanceMap[self.layout.walls] = distances
+    global distanceThread
+    distanceSemaphore.acquire()
+
+    # mazeDistances memoizes the table per wall layout, in this process and
+    # on disk, so only the first Distancer for a layout computes anything
+    distanceThread = self
+    try:
+      distances = mazeDistances.getMazeDistances(self.layout.walls)
+    finally:
       distanceThread = None
-    else:
-      distances = distanceMap[self.layout.walls]
+      distanceSemaphore.release()
+    #TODO:for oj
+    # print('[Distancer]: Switching to maze distances',file=sys.stdout)
 
-    distanceMapSemaphore.release()
     self.distancer._distances = distances
 
-def computeDistances(layout):
-    distances = {}
-    allNodes = layout.walls.asList(False)
-    for source in allNodes:
-        dist = {}
-        closed = {}
-        for node in allNodes:
-            dist[node] = 1000000000
-        import util
-        queue = util.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
-            if not layout.isWall((x,y+1)):
-                adjacent.append((x,y+1))
-            if not layout.isWall((x,y-1)):
-                adjacent.append((x,y-1) )
-            if not layout.isWall((x+1,y)):
-                adjacent.append((x+1,y) )
-            if not layout.isWall((x-1,y)):
-                adjacent.append((x-1,y))
-            for other in adjacent:
-                if not other in dist:
-                    continue
-                oldDist = dist[other]
-                newDist = nodeDist+1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
-    return distances
-
-
 def getDistanceOnGrid(distances, pos1, pos2):
     key = (pos1, pos2)
     if key in distances:
@@ -0,0 +1,196 @@
+# mazeDistances.py
+# ----------------
+# All-pairs maze distances for the walls of a layout.
+
+"""
+MazeDistances runs one breadth first search from every open cell of a wall
+grid and keeps the results in a flat array of unsigned shorts, one row per
+source cell.  After that every maze distance is a single array lookup.
+
+Tables are memoized per wall grid in this process, and persisted to CACHE_DIR
+under a hash of the wall layout, so later runs on the same layout read them
+back from disk instead of searching again.
+
+The full table takes 2 * n * n bytes for n open cells, so grids with more than
+DENSE_TABLE_CELLS open cells only search from a cell the first time a distance
+from it is asked for, and keep the ROW_CACHE_SIZE rows used most recently.
+
+Example:
+distances = getMazeDistances(gameState.getWalls())
+distances.getDistance( (1,1), (10,10) )
+"""
+
+import array, collections, hashlib, os, struct, sys
+
+# Set to None to keep tables in memory only
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mazeDistanceCache')
+
+# Stored for pairs of cells with no path between them
+UNREACHABLE = 65535
+
+# Larger grids get rows computed on demand rather than a full table (32MB here)
+DENSE_TABLE_CELLS = 4096
+
+# Rows kept for grids above DENSE_TABLE_CELLS
+ROW_CACHE_SIZE = 256
+
+_CACHE_MAGIC = b'MZD1'
+
+class MazeDistances:
+    """
+    The maze distance between every pair of open cells of a wall grid.
+
+    Cells are numbered in walls.asList(False) order; the distance from cell i
+    to cell j is getRow(i)[j].  For grids of at most DENSE_TABLE_CELLS open
+    cells the rows are slices of distances, a flat table with the distance
+    from i to j at distances[i * len(cells) + j].  Above that distances is
+    None and rows are searched on demand.
+    """
+    def __init__(self, walls, distances=None):
+        self.width = walls.width
+        self.height = walls.height
+        self.cells = walls.asList(False)
+        self.cellIndex = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.neighbors = []
+        for x, y in self.cells:
+            adjacent = []
+            for nextCell in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+                if nextCell in self.cellIndex:
+                    adjacent.append(self.cellIndex[nextCell])
+            self.neighbors.append(adjacent)
+        self.rows = collections.OrderedDict()
+        if distances == None and self.isDense():
+            distances = self._computeDistances()
+        self.distances = distances
+        if distances != None:
+            self.table = memoryview(distances)
+
+    def isDense(self):
+        "Whether the whole table is kept, rather than recently used rows"
+        return len(self.cells) <= DENSE_TABLE_CELLS
+
+    def getRow(self, index):
+        "Returns a sequence of the distances from cell number index to every cell"
+        n = len(self.cells)
+        if self.distances != None:
+            return self.table[index * n:(index + 1) * n]
+        row = self.rows.get(index)
+        if row == None:
+            row = array.array('H', [UNREACHABLE]) * n
+            self._search(index, row, 0)
+            self.rows[index] = row
+            if len(self.rows) > ROW_CACHE_SIZE:
+                self.rows.popitem(last=False)
+        else:
+            self.rows.move_to_end(index)
+        return row
+
+    def getDistance(self, pos1, pos2, default=float('inf')):
+        """
+        Returns the maze distance between two open cells, or default if there
+        is no path.  Raises KeyError if either position is not an open cell.
+        """
+        distance = self.getRow(self.cellIndex[pos1])[self.cellIndex[pos2]]
+        if distance == UNREACHABLE: return default
+        return distance
+
+    def getDistancesFrom(self, pos):
+        "Returns a dictionary from every open cell to its maze distance from pos"
+        row = self.getRow(self.cellIndex[pos])
+        return dict((cell, row[i]) for i, cell in enumerate(self.cells) if row[i] != UNREACHABLE)
+
+    def _computeDistances(self):
+        n = len(self.cells)
+        distances = array.array('H', [UNREACHABLE]) * (n * n)
+        for source in range(n):
+            self._search(source, distances, source * n)
+        return distances
+
+    def _search(self, source, distances, row):
+        "Breadth first search from source, filling distances[row:row + len(cells)]"
+        neighbors = self.neighbors
+        distances[row + source] = 0
+        frontier, depth = [source], 0
+        while frontier:
+            depth += 1
+            nextFrontier = []
+            for cell in frontier:
+                for other in neighbors[cell]:
+                    if distances[row + other] == UNREACHABLE:
+                        distances[row + other] = depth
+                        nextFrontier.append(other)
+            frontier = nextFrontier
+
+_tables = {} # wall layout key -> MazeDistances
+_tablesByGrid = {} # id(walls) -> (walls, MazeDistances)
+
+def getMazeDistances(walls):
+    """
+    Returns the MazeDistances for a wall grid, computing it at most once per
+    wall layout in this process and at most once per layout on this machine
+    when CACHE_DIR is writable.
+    """
+    entry = _tablesByGrid.get(id(walls))
+    if entry != None and entry[0] is walls:
+        return entry[1]
+
+    key = wallKey(walls)
+    if key not in _tables:
+        table = _loadTable(walls, key)
+        if table == None:
+            table = MazeDistances(walls)
+            _saveTable(table, key)
+        _tables[key] = table
+    # Holding on to walls keeps its id from being reused by another grid
+    _tablesByGrid[id(walls)] = (walls, _tables[key])
+    return _tables[key]
+
+def wallKey(walls):
+    "Returns a hex digest that identifies the layout of a wall grid"
+    rows = [''.join(['%' if walls[x][y] else ' ' for x in range(walls.width)]) for y in range(walls.height)]
+    text = '%d %d\n%s' % (walls.width, walls.height, '\n'.join(rows))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+def _cachePath(key):
+    return os.path.join(CACHE_DIR, key + '.dist')
+
+def _loadTable(walls, key):
+    if CACHE_DIR == None: return None
+    try:
+        f = open(_cachePath(key), 'rb')
+    except OSError:
+        return None
+    try:
+        header = f.read(8)
+        if len(header) != 8 or header[:4] != _CACHE_MAGIC: return None
+        n = struct.unpack('<I', header[4:])[0]
+        if n != walls.count(False) or n > DENSE_TABLE_CELLS: return None
+        distances = array.array('H')
+        distances.fromfile(f, n * n)
+    except (OSError, EOFError):
+        return None
+    finally:
+        f.close()
+    if sys.byteorder == 'big': distances.byteswap()
+    return MazeDistances(walls, distances)
+
+def _saveTable(table, key):
+    if CACHE_DIR == None or table.distances == None: return
+    distances = table.distances
+    if sys.byteorder == 'big':
+        distances = array.array('H', distances)
+        distances.byteswap()
+    path = _cachePath(key)
+    tmpPath = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        f = open(tmpPath, 'wb')
+        try:
+            f.write(_CACHE_MAGIC + struct.pack('<I', len(table.cells)))
+            distances.tofile(f)
+        finally:
+            f.close()
+        os.replace(tmpPath, path)
+    except OSError:
+        # The cache is only an optimization; a read-only tree still works
+        if os.path.exists(tmpPath): os.remove(tmpPath)
@@ -29,6 +29,7 @@
 import sys
 import inspect
 import heapq, random
+import collections
 import io
 
 
@@ -151,22 +152,32 @@ class Stack:
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        self.deque = collections.deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.deque.appendleft(item)
 
     def pop(self):
         """
           Dequeue the earliest enqueued item still in the queue. This
           operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.deque.pop()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
-        return len(self.list) == 0
+        return len(self.deque) == 0
+
+    def _getList(self):
+        """
+          A snapshot of the queued items, most recently enqueued first.  It
+          is a tuple, so code that used to change the queue through its list
+          fails instead of changing a copy; push and pop change the queue.
+        """
+        return tuple(self.deque)
+
+    list = property(_getList)
 
 class PriorityQueue:
     """